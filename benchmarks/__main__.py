@@ -0,0 +1,57 @@
+"""Run the benchmark suite and compare it with a baseline from the same machine.
+
+Usage:
+    python -m benchmarks --save-baseline  # run and store the results as the baseline
+    python -m benchmarks                  # run, save results.json, fail on regressions
+
+Timings depend on the machine, so no baseline is committed: save one on the
+machine that does the comparison, e.g. from the base commit in CI.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from .harness import compare, format_table, load_results, merge_runs, save_results, speed_factor
+from .suite import run_suite
+
+BENCHMARK_DIR = Path(__file__).parent
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the service and auth hot paths")
+    parser.add_argument("--baseline", type=Path, default=BENCHMARK_DIR / "baseline.json")
+    parser.add_argument("--output", type=Path, default=BENCHMARK_DIR / "results.json")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed slowdown of the fastest round beyond the baseline's run-to-run "
+                             "spread, after correcting for overall machine speed, as a fraction (default 0.5)")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="suite runs to merge; separate processes can differ by 2x on shared machines (default 3)")
+    args = parser.parse_args()
+
+    results = merge_runs([run_suite(BENCHMARK_DIR / "bench.db") for _ in range(args.repeat)])
+    save_results(args.output, results)
+
+    if args.save_baseline:
+        save_results(args.baseline, results)
+        print(format_table(results))
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(format_table(results))
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline on this machine to compare against")
+        return 0
+    baseline = load_results(args.baseline)
+    print(format_table(results, baseline))
+    print(f"\nThis run was {speed_factor(results, baseline):.2f}x the baseline's time overall; "
+          "changes above are relative to that")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nRegressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import gc
+import json
+import platform
+import statistics
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    rounds: int
+    number: int
+    median: float
+    mean: float
+    min: float
+    p95: float
+    # Slowest per-run minimum when several runs were merged; the run-to-run noise band
+    min_high: float | None = None
+
+
+def run_benchmark(name: str, func: Callable[[Any], Any], setup: Callable[[], Any] | None = None,
+                  rounds: int = 20, number: int = 1, warmup: int = 2) -> BenchmarkResult:
+    """Time ``func(state)`` and report seconds per call.
+
+    ``setup`` runs untimed before every round and its return value is passed
+    to ``func``; benchmarks that need fresh state per call use ``number=1``.
+    The collector is paused while timing, as timeit does.
+    """
+    timings = []
+    for round_index in range(warmup + rounds):
+        state = setup() if setup else None
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            for _ in range(number):
+                func(state)
+            elapsed = (time.perf_counter() - started) / number
+        finally:
+            gc.enable()
+        if round_index >= warmup:
+            timings.append(elapsed)
+    timings.sort()
+    return BenchmarkResult(
+        name=name,
+        rounds=rounds,
+        number=number,
+        median=statistics.median(timings),
+        mean=statistics.fmean(timings),
+        min=timings[0],
+        p95=timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    )
+
+
+def merge_runs(runs: list[list[BenchmarkResult]]) -> list[BenchmarkResult]:
+    """Combine repeated suite runs, keeping each case's best minimum and its slowest one"""
+    merged = []
+    for results in zip(*runs):
+        merged.append(BenchmarkResult(
+            name=results[0].name,
+            rounds=sum(result.rounds for result in results),
+            number=results[0].number,
+            median=statistics.median(result.median for result in results),
+            mean=statistics.fmean(result.mean for result in results),
+            min=min(result.min for result in results),
+            p95=max(result.p95 for result in results),
+            min_high=max(result.min for result in results),
+        ))
+    return merged
+
+
+def save_results(path: Path, results: list[BenchmarkResult]) -> None:
+    document = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {result.name: asdict(result) for result in results},
+    }
+    path.write_text(json.dumps(document, indent=2) + "\n")
+
+
+def load_results(path: Path) -> dict[str, dict]:
+    return json.loads(path.read_text())["results"]
+
+
+def speed_factor(results: list[BenchmarkResult], baseline: dict[str, dict]) -> float:
+    """Median ratio of fastest rounds against the baseline: how much slower this run's machine is.
+
+    Frequency scaling and noisy neighbours move every case together, so
+    dividing by the median keeps them from failing the comparison while a
+    case that slowed down on its own still stands out.
+    """
+    ratios = [result.min / baseline[result.name]["min"] for result in results if result.name in baseline]
+    return statistics.median(ratios) if ratios else 1.0
+
+
+def compare(results: list[BenchmarkResult], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    """Return the names of benchmarks whose fastest round regressed beyond the noise.
+
+    The minimum is compared because noise from other processes only ever
+    adds time; the median is reported for reading. The baseline is scaled
+    by ``speed_factor``, and a case fails only when its best minimum is
+    more than ``tolerance`` above the slowest per-run minimum the baseline
+    saw, which is how far repeated runs of unchanged code drift apart.
+    """
+    scale = speed_factor(results, baseline)
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.name)
+        if reference is None:
+            continue
+        noise_band = (reference.get("min_high") or reference["min"]) * scale
+        if result.min > noise_band * (1 + tolerance):
+            regressions.append(result.name)
+    return regressions
+
+
+def format_table(results: list[BenchmarkResult], baseline: dict[str, dict] | None = None) -> str:
+    """Changes are relative to the baseline scaled by this run's speed factor"""
+    scale = speed_factor(results, baseline) if baseline else 1.0
+    lines = [f"{'benchmark':<40} {'min':>12} {'median':>12} {'p95':>12} {'min vs baseline':>16}"]
+    for result in results:
+        change = ""
+        if baseline and result.name in baseline:
+            change = f"{result.min / (baseline[result.name]['min'] * scale) - 1:+.1%}"
+        lines.append(f"{result.name:<40} {_duration(result.min):>12} {_duration(result.median):>12} "
+                     f"{_duration(result.p95):>12} {change:>16}")
+    return "\n".join(lines)
+
+
+def _duration(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
@@ -0,0 +1,241 @@
+import logging
+import os
+import queue
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from logging.handlers import QueueListener
+from pathlib import Path
+from uuid import uuid4
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from src.auth.models import TokenData
+from src.auth.service import create_access_token, verify_token
+from src.auth.token_cache import token_cache
+from src.cache import NullCache
+from src.database.core import Base
+from src.entities.todo import Todo, Priority
+from src.entities.user import User
+from src import logging as app_logging
+from src.logging import JsonFormatter, NonBlockingQueueHandler, RequestSamplingFilter
+from src.responses import model_response
+from src.todos import service as todos_service
+from src.todos.cache import todo_cache
+from src.todos.models import (DEFAULT_PAGE_SIZE, SortOrder, TodoBatchOperation, TodoBatchRequest, TodoCreate,
+                              TodoFilters, TodoSortKey, todo_list_adapter)
+
+from .harness import BenchmarkResult, run_benchmark
+
+LIST_SIZES = (10, 1_000, 100_000)
+SEED_CHUNK_SIZE = 10_000
+LOGGING_SLOW_SINK_DELAY = 0.0002
+
+
+def make_session_factory(path: Path) -> sessionmaker:
+    if path.exists():
+        path.unlink()
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+def seed_user(session_factory: sessionmaker, rows: int) -> TokenData:
+    user_id = uuid4()
+    now = datetime.now(timezone.utc)
+    priorities = list(Priority)
+    with session_factory() as db:
+        db.add(User(id=user_id, email=f"bench-{user_id}@example.com", first_name="Bench", last_name="User",
+                    password_hash="unused"))
+        for start in range(0, rows, SEED_CHUNK_SIZE):
+            db.execute(insert(Todo), [
+                {
+                    "id": uuid4(),
+                    "user_id": user_id,
+                    "description": f"Benchmark todo {i}",
+                    "priority": priorities[i % len(priorities)],
+                    "is_completed": i % 4 == 0,
+                    "created_at": now - timedelta(seconds=i),
+                    "due_date": now + timedelta(hours=i % 500) if i % 3 else None,
+                }
+                for i in range(start, min(start + SEED_CHUNK_SIZE, rows))
+            ])
+        db.commit()
+    return TokenData(user_id=str(user_id))
+
+
+def auth_benchmarks() -> list[BenchmarkResult]:
+    user_id = uuid4()
+    token = create_access_token("bench@example.com", user_id, timedelta(minutes=30))
+    return [
+        run_benchmark("auth.create_access_token",
+                      lambda _: create_access_token("bench@example.com", user_id, timedelta(minutes=30)),
+                      number=200),
+        run_benchmark("auth.verify_token.uncached", lambda _: verify_token(token), setup=token_cache.clear,
+                      rounds=200),
+        run_benchmark("auth.verify_token.cached", lambda _: verify_token(token), number=1000),
+    ]
+
+
+def read_benchmarks(session_factory: sessionmaker) -> list[BenchmarkResult]:
+    results = []
+    filters = TodoFilters(completed=False, sort=TodoSortKey.due_date, order=SortOrder.asc)
+    for size in LIST_SIZES:
+        user = seed_user(session_factory, size)
+
+        def first_page(_, user=user):
+            with session_factory() as db:
+                todos_service.get_todos(user, db, limit=DEFAULT_PAGE_SIZE)
+
+        def filtered_page(_, user=user):
+            with session_factory() as db:
+                todos_service.get_todos(user, db, filters=filters, limit=DEFAULT_PAGE_SIZE)
+
+        results.append(run_benchmark(f"todos.get_todos.page[rows={size}]", first_page, number=5))
+        results.append(run_benchmark(f"todos.get_todos.filtered[rows={size}]", filtered_page, number=5))
+        if size <= 1_000:
+            def everything(_, user=user):
+                with session_factory() as db:
+                    todos_service.get_todos(user, db)
+
+            results.append(run_benchmark(f"todos.get_todos.all[rows={size}]", everything))
+    return results
+
+
+def serialization_benchmarks(session_factory: sessionmaker) -> list[BenchmarkResult]:
+    user = seed_user(session_factory, 1_000)
+    with session_factory() as db:
+        todos = todos_service.get_todos(user, db)
+    return [
+        run_benchmark("responses.todo_list[items=1000]", lambda _: model_response(todo_list_adapter, todos)),
+    ]
+
+
+def write_benchmarks(session_factory: sessionmaker) -> list[BenchmarkResult]:
+    user = seed_user(session_factory, 1_000)
+    todo = TodoCreate(description="Benchmark write", priority=Priority.High)
+
+    def new_todo():
+        with session_factory() as db:
+            return todos_service.create_todo(user, db, todo).id
+
+    def create(_):
+        with session_factory() as db:
+            todos_service.create_todo(user, db, todo)
+
+    def update(todo_id):
+        with session_factory() as db:
+            todos_service.update_todo(user, db, todo_id, todo)
+
+    def complete(todo_id):
+        with session_factory() as db:
+            todos_service.complete_todo(user, db, todo_id)
+
+    def delete(todo_id):
+        with session_factory() as db:
+            todos_service.delete_todo(user, db, todo_id)
+
+    def batch(request):
+        with session_factory() as db:
+            todos_service.apply_todo_batch(user, db, request)
+
+    def batch_request():
+        ids = [new_todo() for _ in range(20)]
+        operations = [TodoBatchOperation(op="create", todo=todo) for _ in range(60)]
+        operations += [TodoBatchOperation(op="update", id=todo_id, todo=todo) for todo_id in ids[:10]]
+        operations += [TodoBatchOperation(op="delete", id=todo_id) for todo_id in ids[10:]]
+        return TodoBatchRequest(operations=operations)
+
+    return [
+        run_benchmark("todos.create_todo", create, rounds=50),
+        run_benchmark("todos.update_todo", update, setup=new_todo, rounds=50),
+        run_benchmark("todos.complete_todo", complete, setup=new_todo, rounds=50),
+        run_benchmark("todos.delete_todo", delete, setup=new_todo, rounds=50),
+        run_benchmark("todos.apply_todo_batch[ops=80]", batch, setup=batch_request, rounds=10),
+    ]
+
+
+@contextmanager
+def root_logging(handler: logging.Handler, level: int):
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    root.handlers = [handler]
+    root.setLevel(level)
+    try:
+        yield
+    finally:
+        root.handlers = saved_handlers
+        root.setLevel(saved_level)
+
+
+class SlowSink:
+    """A log destination that blocks on each write, like a full pipe to a collector"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def write(self, text: str) -> None:
+        time.sleep(self.delay)
+
+    def flush(self) -> None:
+        pass
+
+
+def logging_benchmarks() -> list[BenchmarkResult]:
+    """Request-path cost of the five info lines a typical request logs"""
+    user_id, todo_id = uuid4(), uuid4()
+
+    def eager(_):
+        for count in range(5):
+            logging.info(f"Retrieved {count} todos for user {user_id}, todo {todo_id}")
+
+    def lazy(_):
+        for count in range(5):
+            logging.info("Retrieved %s todos for user %s, todo %s", count, user_id, todo_id)
+
+    results = []
+    with open(os.devnull, "w") as devnull:
+        for sink_name, sink in (("devnull", devnull), ("slow", SlowSink(LOGGING_SLOW_SINK_DELAY))):
+            stream = logging.StreamHandler(sink)
+            stream.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+            with root_logging(stream, logging.INFO):
+                results.append(run_benchmark(f"logging.request[{sink_name},stream,eager]", eager, number=20))
+
+            json_stream = logging.StreamHandler(sink)
+            json_stream.setFormatter(JsonFormatter())
+            listener = QueueListener(queue.Queue(), json_stream)
+            listener.start()
+            try:
+                handler = NonBlockingQueueHandler(listener.queue)
+                with root_logging(handler, logging.INFO):
+                    results.append(run_benchmark(f"logging.request[{sink_name},queue,lazy]", lazy, number=20))
+            finally:
+                listener.stop()
+
+        stream = logging.StreamHandler(devnull)
+        with root_logging(stream, logging.WARNING):
+            results.append(run_benchmark("logging.request[disabled,eager]", eager, number=200))
+            results.append(run_benchmark("logging.request[disabled,lazy]", lazy, number=200))
+
+        handler = NonBlockingQueueHandler(queue.Queue())
+        handler.addFilter(RequestSamplingFilter())
+        token = app_logging._request_sampled.set(False)
+        try:
+            with root_logging(handler, logging.INFO):
+                results.append(run_benchmark("logging.request[queue,lazy,unsampled]", lazy, number=200))
+        finally:
+            app_logging._request_sampled.reset(token)
+    return results
+
+
+def run_suite(db_path: Path) -> list[BenchmarkResult]:
+    # Measure the database path, not the read-through cache
+    todo_cache.cache = NullCache()
+    session_factory = make_session_factory(db_path)
+    try:
+        return (auth_benchmarks() + logging_benchmarks() + read_benchmarks(session_factory)
+                + serialization_benchmarks(session_factory) + write_benchmarks(session_factory))
+    finally:
+        session_factory.kw["bind"].dispose()
+        db_path.unlink(missing_ok=True)
@@ -0,0 +1,27 @@
+"""add todos pagination index
+
+Revision ID: 1428cdf5c70b
+Revises: 833236fe652e
+Create Date: 2026-10-18 09:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '1428cdf5c70b'
+down_revision: Union[str, Sequence[str], None] = '833236fe652e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_todos_user_id_created_at_id', 'todos',
+                    ['user_id', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_todos_user_id_created_at_id', table_name='todos')
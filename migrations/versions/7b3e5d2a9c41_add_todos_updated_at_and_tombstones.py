@@ -0,0 +1,43 @@
+"""add todos updated_at and tombstones
+
+Revision ID: 7b3e5d2a9c41
+Revises: f921963d1c1b
+Create Date: 2026-10-18 16:02:37.518340
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e5d2a9c41'
+down_revision: Union[str, Sequence[str], None] = 'f921963d1c1b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('todos', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE todos SET updated_at = COALESCE(completed_at, created_at)")
+    op.alter_column('todos', 'updated_at', nullable=False)
+    op.create_index('ix_todos_user_id_updated_at_id', 'todos',
+                    ['user_id', 'updated_at', 'id'])
+    op.create_table(
+        'todo_tombstones',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_todo_tombstones_user_id_deleted_at_id', 'todo_tombstones',
+                    ['user_id', 'deleted_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_todo_tombstones_user_id_deleted_at_id', table_name='todo_tombstones')
+    op.drop_table('todo_tombstones')
+    op.drop_index('ix_todos_user_id_updated_at_id', table_name='todos')
+    op.drop_column('todos', 'updated_at')
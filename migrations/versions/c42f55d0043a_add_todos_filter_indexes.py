@@ -0,0 +1,30 @@
+"""add todos filter indexes
+
+Revision ID: c42f55d0043a
+Revises: 1428cdf5c70b
+Create Date: 2026-10-18 10:04:17.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c42f55d0043a'
+down_revision: Union[str, Sequence[str], None] = '1428cdf5c70b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_todos_user_id_is_completed_due_date', 'todos',
+                    ['user_id', 'is_completed', 'due_date'])
+    op.create_index('ix_todos_user_id_priority', 'todos',
+                    ['user_id', 'priority'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_todos_user_id_priority', table_name='todos')
+    op.drop_index('ix_todos_user_id_is_completed_due_date', table_name='todos')
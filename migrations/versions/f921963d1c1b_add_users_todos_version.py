@@ -0,0 +1,28 @@
+"""add users todos version
+
+Revision ID: f921963d1c1b
+Revises: c42f55d0043a
+Create Date: 2026-10-18 13:41:06.274519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f921963d1c1b'
+down_revision: Union[str, Sequence[str], None] = 'c42f55d0043a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('todos_version', sa.Integer(),
+                                     nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'todos_version')
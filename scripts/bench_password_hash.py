@@ -0,0 +1,56 @@
+"""Measure password hashes per second per core at each cost setting.
+
+One thread hashes back to back, so the rate is what a single core sustains;
+multiply by PASSWORD_HASH_WORKERS (at most the core count) for the login
+capacity of one worker process. Verifying costs the same as hashing.
+
+Usage: python -m scripts.bench_password_hash [--bcrypt-rounds 10,11,12,13] [--seconds 2]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+
+from passlib.exc import MissingBackendError  # noqa: E402
+
+from src.auth.hashing import ARGON2_PARALLELISM, create_password_context  # noqa: E402
+
+# (time_cost, memory_cost in KiB): OWASP's minimum, then progressively heavier
+ARGON2_SETTINGS = ((2, 19456), (3, 65536), (4, 131072))
+
+
+def hashes_per_second(context, seconds: float) -> float:
+    context.hash("warm-up password")
+    count = 0
+    started = time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        context.hash("benchmark password")
+        count += 1
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bcrypt-rounds", default="10,11,12,13",
+                        help="comma separated bcrypt cost factors (default 10,11,12,13)")
+    parser.add_argument("--seconds", type=float, default=2, help="time spent on each setting (default 2)")
+    args = parser.parse_args()
+
+    print(f"{'setting':<40} {'hashes/s/core':>14} {'ms/hash':>9}")
+    settings = [(f"bcrypt rounds={rounds}", create_password_context("bcrypt", bcrypt_rounds=int(rounds)))
+                for rounds in args.bcrypt_rounds.split(",")]
+    settings += [(f"argon2 t={time_cost} m={memory_cost // 1024}MiB p={ARGON2_PARALLELISM}",
+                  create_password_context("argon2", argon2_time_cost=time_cost, argon2_memory_cost=memory_cost))
+                 for time_cost, memory_cost in ARGON2_SETTINGS]
+    for name, context in settings:
+        try:
+            rate = hashes_per_second(context, args.seconds)
+        except MissingBackendError:
+            print(f"{name:<40} skipped, install argon2-cffi")
+            continue
+        print(f"{name:<40} {rate:>14.1f} {1000 / rate:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare the default response_model path with model_response on large lists.
+
+Usage: python -m scripts.bench_serialization [--items 10000] [--repeat 5]
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from src.entities.todo import Todo, Priority  # noqa: E402
+from src.responses import model_response  # noqa: E402
+from src.todos.models import TodoResponse, todo_list_adapter  # noqa: E402
+
+
+def make_todos(count: int) -> list[Todo]:
+    now = datetime.now(timezone.utc)
+    user_id = uuid4()
+    return [
+        Todo(id=uuid4(), user_id=user_id, description=f"Todo number {i}", is_completed=i % 3 == 0,
+             priority=list(Priority)[i % len(Priority)], created_at=now - timedelta(seconds=i),
+             due_date=now + timedelta(days=i % 30) if i % 2 else None,
+             completed_at=now if i % 3 == 0 else None)
+        for i in range(count)
+    ]
+
+
+def default_body(adapter: TypeAdapter, todos: list[Todo]) -> bytes:
+    # What FastAPI does for a route returning ORM objects through response_model
+    validated = adapter.validate_python(todos, from_attributes=True)
+    return JSONResponse(adapter.dump_python(validated, mode="json", by_alias=True)).body
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    todos = make_todos(args.items)
+    default_adapter = TypeAdapter(list[TodoResponse])
+    assert default_body(default_adapter, todos) == model_response(todo_list_adapter, todos).body
+
+    default = best_of(args.repeat, lambda: default_body(default_adapter, todos))
+    fast = best_of(args.repeat, lambda: model_response(todo_list_adapter, todos))
+    print(f"{args.items} todos, best of {args.repeat}")
+    print(f"  response_model: {default * 1000:8.1f} ms")
+    print(f"  model_response: {fast * 1000:8.1f} ms  ({default / fast:.1f}x faster, identical bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,28 @@ from fastapi import FastAPI
 from src.todos.controller import router as todos_router
 from src.auth.controller import router as auth_router
 from src.users.controller import router as users_router
+from src.internal.controller import (router as internal_router, health_router, metrics_router,
+                                     INTERNAL_ENDPOINTS_ENABLED, INTERNAL_API_TOKEN)
+from src.monitoring import request_metrics
 
-def register_routes(app: FastAPI):
-    app.include_router(todos_router)
-    app.include_router(auth_router)
-    app.include_router(users_router)
\ No newline at end of file
+ROUTERS = {
+    "todos": todos_router,
+    "auth": auth_router,
+    "users": users_router,
+    "health": health_router,
+}
+
+INTERNAL_ROUTERS = {
+    "internal": internal_router,
+    "metrics": metrics_router,
+}
+
+def register_routes(app: FastAPI, internal_enabled: bool = INTERNAL_ENDPOINTS_ENABLED):
+    routers = dict(ROUTERS)
+    if internal_enabled:
+        if not INTERNAL_API_TOKEN:
+            raise RuntimeError("INTERNAL_ENDPOINTS_ENABLED=true requires INTERNAL_API_TOKEN")
+        routers.update(INTERNAL_ROUTERS)
+    for name, router in routers.items():
+        app.include_router(router)
+        request_metrics.add_router(name, router)
@@ -4,8 +4,8 @@ from starlette import status
 from . import  models
 from . import service
 from fastapi.security import OAuth2PasswordRequestForm
-from ..database.core import DbSession
-from ..rate_limiter import limiter
+from ..database.core import AsyncDbSession
+from ..rate_limiter import limiter, login_limiter
 router = APIRouter(
     prefix='/auth',
     tags=['auth']
@@ -14,15 +14,16 @@ router = APIRouter(
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 @limiter.limit("5/hour")
-async def register_user(request: Request, db: DbSession,
+async def register_user(request: Request, db: AsyncDbSession,
                       register_user_request: models.RegisterUserRequest):
-    service.register_user(db, register_user_request)
+    await service.register_user_async(db, register_user_request)
 
 
 @router.post("/token", response_model=models.Token)
-async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-                                 db: DbSession):
-    return service.login_for_access_token(form_data, db)
+async def login_for_access_token(request: Request, form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+                                 db: AsyncDbSession):
+    await login_limiter.check(request, form_data.username)
+    return await service.login_for_access_token_async(form_data, db)
 
 
 
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from passlib.context import CryptContext
+
+from ..exceptions import ServiceUnavailableError
+from ..metrics import Histogram
+
+T = TypeVar("T")
+
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv('PASSWORD_HASH_QUEUE_LIMIT', '32'))
+
+# New hashes use PASSWORD_HASH_SCHEME at these costs; argon2 requires the argon2-cffi package
+PASSWORD_HASH_SCHEME = os.getenv('PASSWORD_HASH_SCHEME', 'bcrypt')
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', '2'))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', '19456'))
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', '1'))
+
+PASSWORD_HASH_SCHEMES = ('bcrypt', 'argon2')
+
+
+def create_password_context(scheme: str = PASSWORD_HASH_SCHEME, bcrypt_rounds: int = BCRYPT_ROUNDS,
+                            argon2_time_cost: int = ARGON2_TIME_COST,
+                            argon2_memory_cost: int = ARGON2_MEMORY_COST,
+                            argon2_parallelism: int = ARGON2_PARALLELISM) -> CryptContext:
+    """Hash with ``scheme`` at the given cost and still verify the other schemes.
+
+    Hashes made with another scheme or at a different cost report
+    ``needs_update``, so ``verify_and_update`` rehashes them on the next
+    successful login whether the cost went up or down.
+    """
+    if scheme not in PASSWORD_HASH_SCHEMES:
+        raise ValueError(f"Unsupported password hash scheme: {scheme}")
+    return CryptContext(
+        schemes=[scheme, *(other for other in PASSWORD_HASH_SCHEMES if other != scheme)],
+        deprecated='auto',
+        bcrypt__rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        argon2__time_cost=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__max_rounds=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+
+class PasswordHashPool:
+    """Bounded worker pool for bcrypt work.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism
+    without blocking the event loop. At most ``max_workers + queue_limit``
+    calls are admitted at once; anything beyond that is rejected with a 503
+    rather than left to pile up behind the workers.
+    """
+
+    def __init__(self, max_workers: int = PASSWORD_HASH_WORKERS,
+                 queue_limit: int = PASSWORD_HASH_QUEUE_LIMIT):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self.wait_time = Histogram()
+        self.rejected = 0
+        self.reset_after_fork()
+
+    def reset_after_fork(self) -> None:
+        """Worker threads and in-flight slots belong to the parent; start over"""
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.queue_limit)
+        self._lock = threading.Lock()
+
+    def _submit(self, fn: Callable[..., T], *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            logging.warning("Password hash queue is full, rejecting request")
+            raise ServiceUnavailableError("Authentication service is busy, try again later")
+
+        queued_at = time.perf_counter()
+
+        def run() -> T:
+            self.wait_time.observe(time.perf_counter() - queued_at)
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+
+        try:
+            return self._executor.submit(run)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def run(self, fn: Callable[..., T], *args) -> T:
+        return self._submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable[..., T], *args) -> T:
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "queue_limit": self.queue_limit,
+            "rejected": self.rejected,
+            "wait_time": self.wait_time.snapshot(),
+        }
+
+
+password_context = create_password_context()
+password_pool = PasswordHashPool()
+os.register_at_fork(after_in_child=password_pool.reset_after_fork)
@@ -13,6 +13,8 @@ class Token(BaseModel):
     
 class TokenData(BaseModel):
     user_id: str | None = None
+    # The token's exp claim as a Unix timestamp; long-lived responses stop at it
+    expires_at: float | None = None
 
     def get_uuid(self) -> UUID | None:
         if self.user_id:
@@ -2,14 +2,17 @@ from datetime import timedelta, datetime, timezone
 from typing import Annotated
 from uuid import UUID, uuid4
 from fastapi import Depends
-from passlib.context import CryptContext
 import jwt
 from jwt import PyJWTError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.entities.user import User
 from . import models
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from ..exceptions import AuthenticationError
+from .hashing import password_context, password_pool
+from .token_cache import token_cache, INVALID_TOKEN
+from ..timing import phase
 import logging
 import os
 
@@ -20,22 +23,35 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(
     os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES', '30'))
 
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl='auth/token')
-bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return password_context.verify(plain_password, hashed_password)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt_context.verify(plain_password, hashed_password)
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify, returning a new hash when the stored one uses an outdated scheme or cost"""
+    return password_context.verify_and_update(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return bcrypt_context.hash(password)
+    return password_context.hash(password)
 
 
-def authenticate_user(email: str, password: str, db: Session) -> User | bool:
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.password_hash):
-        logging.warning(f"Failed authentication attempt for email: {email}")
+async def authenticate_user_async(email: str, password: str, db: AsyncSession) -> User | bool:
+    user = await db.scalar(select(User).where(User.email == email))
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await password_pool.run_async(verify_and_update_password, password, user.password_hash)
+    if not verified:
+        logging.warning("Failed authentication attempt for email: %s", email)
         return False
+    if new_hash:
+        try:
+            user.password_hash = new_hash
+            await db.commit()
+        except Exception as e:
+            # The old hash still works; try again on the next login
+            await db.rollback()
+            logging.warning("Failed to rehash password for user %s: %s", user.id, e)
     return user
 
 
@@ -49,42 +65,56 @@ def create_access_token(email: str, user_id: UUID, expires_delta: timedelta) ->
 
 
 def verify_token(token: str) -> models.TokenData:
+    cached = token_cache.get(token)
+    if cached is INVALID_TOKEN:
+        raise AuthenticationError()
+    if cached is not None:
+        return cached
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get('id')
-        return models.TokenData(user_id=user_id)
+        token_data = models.TokenData(user_id=user_id, expires_at=payload.get('exp'))
     except PyJWTError as e:
-        logging.warning(f"Token verification failed: {str(e)}")
+        logging.warning("Token verification failed: %s", e)
+        token_cache.put_invalid(token)
         raise AuthenticationError()
+    if 'exp' in payload:
+        token_cache.put(token, token_data, payload['exp'])
+    return token_data
+
+
+def _build_user(register_user_request: models.RegisterUserRequest, password_hash: str) -> User:
+    return User(
+        id=uuid4(),
+        email=register_user_request.email,
+        first_name=register_user_request.first_name,
+        last_name=register_user_request.last_name,
+        password_hash=password_hash
+    )
 
 
-def register_user(db: Session, register_user_request: models.RegisterUserRequest) -> None:
+async def register_user_async(db: AsyncSession, register_user_request: models.RegisterUserRequest) -> None:
     try:
-        create_user_model = User(
-            id=uuid4(),
-            email=register_user_request.email,
-            first_name=register_user_request.first_name,
-            last_name=register_user_request.last_name,
-            password_hash=get_password_hash(register_user_request.password)
-        )
-        db.add(create_user_model)
-        db.commit()
+        password_hash = await password_pool.run_async(get_password_hash, register_user_request.password)
+        db.add(_build_user(register_user_request, password_hash))
+        await db.commit()
     except Exception as e:
         logging.error(
-            f"Failed to register user: {register_user_request.email}. Error: {str(e)}")
+            "Failed to register user: %s. Error: %s", register_user_request.email, e)
         raise
 
 
 def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]) -> models.TokenData:
-    return verify_token(token)
+    with phase("auth"):
+        return verify_token(token)
 
 
 CurrentUser = Annotated[models.TokenData, Depends(get_current_user)]
 
 
-def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-                           db: Session) -> models.Token:
-    user = authenticate_user(form_data.username, form_data.password, db)
+async def login_for_access_token_async(form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+                                       db: AsyncSession) -> models.Token:
+    user = await authenticate_user_async(form_data.username, form_data.password, db)
     if not user:
         raise AuthenticationError()
     token = create_access_token(user.email, user.id, timedelta(
@@ -0,0 +1,94 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from .models import TokenData
+
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '10000'))
+TOKEN_CACHE_NEGATIVE_TTL = float(os.getenv('TOKEN_CACHE_NEGATIVE_TTL', '30'))
+
+# Marker stored for tokens that failed verification
+INVALID_TOKEN = object()
+
+
+class TokenCache:
+    """Bounded LRU of verified tokens, keyed by the token's SHA-256 digest.
+
+    Valid tokens are kept until their ``exp`` claim, so an expired token is
+    never answered from the cache. Tokens that failed verification are kept
+    for ``negative_ttl`` seconds so repeated garbage is rejected cheaply.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, negative_ttl: float = TOKEN_CACHE_NEGATIVE_TTL,
+                 clock: Callable[[], float] = time.time):
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._entries: OrderedDict[bytes, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> TokenData | object | None:
+        """Return cached TokenData, INVALID_TOKEN, or None on a miss"""
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if value is INVALID_TOKEN:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, token: str, token_data: TokenData, expires_at: float) -> None:
+        self._store(token, token_data, expires_at)
+
+    def put_invalid(self, token: str) -> None:
+        self._store(token, INVALID_TOKEN, self._clock() + self.negative_ttl)
+
+    def _store(self, token: str, value: object, expires_at: float) -> None:
+        if self.max_size <= 0 or expires_at <= self._clock():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+token_cache = TokenCache()
@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from .pubsub import redis_client, REDIS_URL
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+CACHE_TTL = float(os.getenv('CACHE_TTL', '60'))
+CACHE_MAX_SIZE = int(os.getenv('CACHE_MAX_SIZE', '10000'))
+
+
+class NullCache:
+    """Cache that stores nothing; used when caching is disabled"""
+
+    def get(self, key: str) -> Any | None:
+        return None
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        pass
+
+    def delete(self, *keys: str) -> None:
+        pass
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU with a per-entry TTL"""
+
+    def __init__(self, max_size: int = CACHE_MAX_SIZE, ttl: float = CACHE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class RedisCache:
+    """Cache shared by every worker, stored as JSON in Redis"""
+
+    def __init__(self, client, ttl: float = CACHE_TTL, prefix: str = "cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any | None:
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(int(ttl), 1))
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+
+def create_cache(backend: str = CACHE_BACKEND, redis_url: str | None = REDIS_URL):
+    if backend == "none":
+        return NullCache()
+    if backend == "redis":
+        if not redis_url:
+            raise RuntimeError("CACHE_BACKEND=redis requires REDIS_URL")
+        return RedisCache(redis_client(redis_url))
+    if backend == "memory":
+        return MemoryCache()
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -1,28 +1,238 @@
+import threading
+from contextlib import AsyncExitStack, ExitStack
 from typing import Annotated
 from fastapi import Depends
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 import os
 
+from .instrumentation import PoolStats, StatementStats, instrumented_pool_class
+from .. import timing
+
 from dotenv import load_dotenv
 
 load_dotenv()
 
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+    async_driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if async_driver is None:
+        raise ValueError(f"No async driver configured for database: {url.get_backend_name()}")
+    return url.set(drivername=async_driver).render_as_string(hide_password=False)
+
+
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Derived from DATABASE_URL when unset
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Comma separated; read-only routes use these unless the user wrote recently
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+DB_REPEATED_STATEMENT_THRESHOLD = int(os.getenv("DB_REPEATED_STATEMENT_THRESHOLD", "10"))
+
+
+def get_pool_options() -> dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+pool_stats = {"sync": PoolStats(), "async": PoolStats(),
+              **{f"replica-{index}": PoolStats() for index in range(len(DATABASE_REPLICA_URLS))}}
+statement_stats = StatementStats(DB_SLOW_QUERY_MS / 1000, DB_REPEATED_STATEMENT_THRESHOLD)
+
+
+class Database:
+    """Engines and session factories for the primary, its async twin and the replicas.
+
+    Nothing is created at import: the app lifespan calls ``start``, and
+    scripts or tests that never run it get everything on first access.
+    Creating an engine does not connect; ``warm_pool`` opens connections
+    ahead of the first requests.
+    """
+
+    def __init__(self, database_url: str | None = DATABASE_URL, async_database_url: str | None = ASYNC_DATABASE_URL,
+                 replica_urls: list[str] = DATABASE_REPLICA_URLS):
+        self.database_url = database_url
+        self.async_database_url = async_database_url
+        self.replica_urls = replica_urls
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            if not self.database_url:
+                raise RuntimeError("DATABASE_URL is not set")
+            async_database_url = self.async_database_url or get_async_database_url(self.database_url)
+
+            self._engine = create_engine(
+                self.database_url, poolclass=instrumented_pool_class(QueuePool, pool_stats["sync"]),
+                **get_pool_options())
+            self._async_engine = create_async_engine(
+                async_database_url, poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, pool_stats["async"]),
+                **get_pool_options())
+            self._replica_engines = [
+                create_engine(url, poolclass=instrumented_pool_class(QueuePool, pool_stats[f"replica-{index}"]),
+                              **get_pool_options())
+                for index, url in enumerate(self.replica_urls)
+            ]
+            pool_stats["sync"].listen(self._engine)
+            pool_stats["async"].listen(self._async_engine.sync_engine)
+            for index, replica_engine in enumerate(self._replica_engines):
+                pool_stats[f"replica-{index}"].listen(replica_engine)
+
+            for instrumented_engine in (self._engine, self._async_engine.sync_engine, *self._replica_engines):
+                statement_stats.listen(instrumented_engine)
+                if timing.SERVER_TIMING_ENABLED:
+                    timing.listen(instrumented_engine)
+
+            # Writes return their rows via RETURNING; expiring them on commit would
+            # cost a SELECT per object on next access
+            self._session_factory = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False,
+                                                 bind=self._engine)
+            self._async_session_factory = async_sessionmaker(autoflush=False, expire_on_commit=False,
+                                                             bind=self._async_engine)
+            self._replica_session_factories = [
+                sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=replica_engine)
+                for replica_engine in self._replica_engines
+            ]
+            self._started = True
 
-engine = create_engine(DATABASE_URL)
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    @property
+    def engine(self) -> Engine:
+        self.start()
+        return self._engine
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        self.start()
+        return self._async_engine
+
+    @property
+    def replica_engines(self) -> list[Engine]:
+        self.start()
+        return self._replica_engines
+
+    @property
+    def session_factory(self) -> sessionmaker:
+        self.start()
+        return self._session_factory
+
+    @property
+    def async_session_factory(self) -> async_sessionmaker:
+        self.start()
+        return self._async_session_factory
+
+    @property
+    def replica_session_factories(self) -> list[sessionmaker]:
+        self.start()
+        return self._replica_session_factories
+
+    def warm_pool(self, connections: int) -> None:
+        """Open up to ``connections`` connections per sync engine and return them to the pool"""
+        for sync_engine in (self.engine, *self.replica_engines):
+            with ExitStack() as stack:
+                for _ in range(min(connections, DB_POOL_SIZE)):
+                    stack.enter_context(sync_engine.connect()).execute(text("SELECT 1"))
+
+    async def warm_async_pool(self, connections: int) -> None:
+        async with AsyncExitStack() as stack:
+            for _ in range(min(connections, DB_POOL_SIZE)):
+                connection = await stack.enter_async_context(self.async_engine.connect())
+                await connection.execute(text("SELECT 1"))
+
+    def reset_after_fork(self) -> None:
+        """Forget connections inherited from the parent without closing the parent's sockets"""
+        self._lock = threading.Lock()
+        if not self._started:
+            return
+        for sync_engine in (self._engine, self._async_engine.sync_engine, *self._replica_engines):
+            sync_engine.dispose(close=False)
+
+    async def dispose(self) -> None:
+        """Close every pooled connection; the engines reconnect if used again"""
+        if not self._started:
+            return
+        await self._async_engine.dispose()
+        for sync_engine in (self._engine, *self._replica_engines):
+            sync_engine.dispose()
+
+
+database = Database()
+os.register_at_fork(after_in_child=database.reset_after_fork)
+
+# Older imports of the module-level engines and factories resolve lazily
+_LAZY_ATTRIBUTES = {
+    "engine": "engine",
+    "async_engine": "async_engine",
+    "replica_engines": "replica_engines",
+    "SessionLocal": "session_factory",
+    "AsyncSessionLocal": "async_session_factory",
+    "ReplicaSessionLocals": "replica_session_factories",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(database, _LAZY_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
 def get_db():
-    db = SessionLocal()
+    db = database.session_factory()
     try:
         yield db
     finally:
         db.close()
 
 
+async def get_async_db():
+    async with database.async_session_factory() as db:
+        yield db
+
+
+def get_pool_status() -> dict:
+    return {
+        "sync": pool_stats["sync"].snapshot(database.engine.pool),
+        "async": pool_stats["async"].snapshot(database.async_engine.sync_engine.pool),
+        **{f"replica-{index}": pool_stats[f"replica-{index}"].snapshot(replica_engine.pool)
+           for index, replica_engine in enumerate(database.replica_engines)},
+    }
+
+
 DbSession = Annotated[Session, Depends(get_db)]
+# Used by the auth routes, which run on the event loop; todos and users stay on DbSession
+# because replica routing, streamed exports and bulk COPY are built on sync sessions
+AsyncDbSession = Annotated[AsyncSession, Depends(get_async_db)]
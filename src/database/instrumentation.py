@@ -0,0 +1,191 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+from ..metrics import Histogram
+
+STATEMENT_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+OTHER_STATEMENTS = "other"
+
+
+class PoolStats:
+    """Checkout counters and wait times for one engine's connection pool"""
+
+    def __init__(self):
+        self.checkout_wait = Histogram()
+        self.timeouts = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def _increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def listen(self, engine: Engine) -> None:
+        """Attach pool event listeners; they carry over when the pool is recreated"""
+        event.listen(engine, "checkout", lambda *args: self._increment("checkouts"))
+        event.listen(engine, "checkin", lambda *args: self._increment("checkins"))
+        event.listen(engine, "connect", lambda *args: self._increment("connects"))
+        event.listen(engine, "invalidate", lambda *args: self._increment("invalidations"))
+
+    def snapshot(self, pool: Pool) -> dict:
+        status = {
+            "pool_class": type(pool).__name__,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "checkout_wait": self.checkout_wait.snapshot(),
+        }
+        if hasattr(pool, "checkedout"):
+            status.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return status
+
+
+class InstrumentedPoolMixin:
+    """Times every checkout, including the wait for a free connection.
+
+    SQLAlchemy has no pool event that fires before a checkout starts, so the
+    wait is measured around ``connect()``. ``stats`` is bound on the class by
+    ``instrumented_pool_class`` so it survives ``Pool.recreate()``.
+    """
+
+    stats: PoolStats
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.stats._increment("timeouts")
+            raise
+        finally:
+            self.stats.checkout_wait.observe(time.perf_counter() - started)
+
+
+def instrumented_pool_class(pool_class: type[Pool], stats: PoolStats) -> type[Pool]:
+    return type(f"Instrumented{pool_class.__name__}", (InstrumentedPoolMixin, pool_class), {"stats": stats})
+
+
+_SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SQL_PARAMS = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_SQL_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SQL_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(statement: str) -> str:
+    """Reduce a statement to its shape: literals and parameters become ?, lists (?)"""
+    normalized = _SQL_LITERALS.sub("?", statement)
+    normalized = _SQL_PARAMS.sub("?", normalized)
+    normalized = _SQL_LISTS.sub("(?)", normalized)
+    return _SQL_WHITESPACE.sub(" ", normalized).strip()
+
+
+class RequestStatements:
+    """Statements issued while serving one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.repeats: Counter[str] = Counter()
+
+
+_request_statements: ContextVar[RequestStatements | None] = ContextVar("request_statements", default=None)
+
+
+class StatementStats:
+    """Per-statement latency, slow-query log and N+1 detection.
+
+    Statements are keyed by their normalized SQL; past ``max_statements``
+    distinct shapes new ones are counted under ``other`` to bound memory.
+    Per-request counting only happens inside ``track_request``.
+    """
+
+    def __init__(self, slow_threshold: float, repeat_threshold: int, max_statements: int = 500):
+        self.slow_threshold = slow_threshold
+        self.repeat_threshold = repeat_threshold
+        self.max_statements = max_statements
+        self.latency: dict[str, Histogram] = {}
+        self.per_request = Histogram(buckets=STATEMENT_COUNT_BUCKETS)
+        self.slow_queries = 0
+        self.repeated_statements = 0
+        self._lock = threading.Lock()
+
+    def listen(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("statement_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        normalized = normalize_sql(statement)
+        self._histogram(normalized).observe(elapsed)
+
+        if elapsed >= self.slow_threshold:
+            with self._lock:
+                self.slow_queries += 1
+            logging.warning("Slow query (%.1f ms): %s", elapsed * 1000, normalized)
+
+        request = _request_statements.get()
+        if request is not None:
+            request.count += 1
+            request.repeats[normalized] += 1
+
+    def _histogram(self, normalized: str) -> Histogram:
+        histogram = self.latency.get(normalized)
+        if histogram is None:
+            with self._lock:
+                if normalized not in self.latency and len(self.latency) >= self.max_statements:
+                    normalized = OTHER_STATEMENTS
+                histogram = self.latency.setdefault(normalized, Histogram())
+        return histogram
+
+    @contextmanager
+    def track_request(self, name: str):
+        """Count the statements issued inside the block and warn on N+1 patterns"""
+        request = RequestStatements()
+        token = _request_statements.set(request)
+        try:
+            yield request
+        finally:
+            _request_statements.reset(token)
+            if request.count:
+                self.per_request.observe(request.count)
+            for normalized, count in request.repeats.items():
+                if count >= self.repeat_threshold:
+                    with self._lock:
+                        self.repeated_statements += 1
+                    logging.warning("Possible N+1 in %s: statement ran %s times: %s", name, count, normalized)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latency = dict(self.latency)
+        return {
+            "slow_queries": self.slow_queries,
+            "repeated_statements": self.repeated_statements,
+            "per_request": self.per_request.snapshot(),
+            "statements": {normalized: histogram.snapshot() for normalized, histogram in latency.items()},
+        }
@@ -0,0 +1,161 @@
+import itertools
+import logging
+import threading
+from typing import Annotated, Iterator
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..auth.service import CurrentUser
+from ..cache import create_cache
+from .core import DB_READ_YOUR_WRITES_SECONDS, DbSession, database
+
+
+class ReplicaRouter:
+    """Sends a user's reads to a replica unless they wrote recently.
+
+    A commit that wrote rows pins its user to the primary for ``window``
+    seconds. On PostgreSQL the pin also records the primary's WAL position,
+    and a replica that has replayed past it is used even inside the window.
+    Pins live in the cache backend, so they are shared across workers with
+    CACHE_BACKEND=redis. Cache errors are logged and pin the read to the
+    primary.
+    """
+
+    def __init__(self, session_factories: list[sessionmaker] | None, cache,
+                 window: float = DB_READ_YOUR_WRITES_SECONDS):
+        self._session_factories = session_factories
+        self.cache = cache
+        self.window = window
+        self.counters = {"replica": 0, "primary": 0}
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def session_factories(self) -> list[sessionmaker]:
+        """The given factories, or when None the configured replicas once the database starts"""
+        if self._session_factories is None:
+            return database.replica_session_factories if database.replica_urls else []
+        return self._session_factories
+
+    @staticmethod
+    def _pin_key(user_id: UUID) -> str:
+        return f"db:primary:{user_id}"
+
+    def _count(self, target: str) -> None:
+        with self._lock:
+            self.counters[target] += 1
+
+    def pin(self, user_id: UUID, lsn: str | None = None) -> None:
+        if not self.session_factories:
+            return
+        try:
+            self.cache.set(self._pin_key(user_id), lsn or "", ttl=self.window)
+        except Exception as e:
+            logging.error("Failed to pin user %s to the primary. Error: %s", user_id, e)
+
+    @staticmethod
+    def _has_replayed(session: Session, lsn: str) -> bool:
+        try:
+            return bool(session.scalar(text("SELECT pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn)"),
+                                       {"lsn": lsn}))
+        except Exception as e:
+            logging.warning("Could not read replica replay position. Error: %s", e)
+            return False
+
+    def replica_session(self, user_id: UUID) -> Session | None:
+        """A session on the next replica, or None when this user's reads belong on the primary"""
+        if not self.session_factories:
+            return None
+        try:
+            # "" pins without a WAL position; a position lets a caught-up replica serve the read
+            pinned_lsn = self.cache.get(self._pin_key(user_id))
+        except Exception as e:
+            logging.error("Failed to read primary pin for user %s. Error: %s", user_id, e)
+            pinned_lsn = ""
+        if pinned_lsn == "":
+            self._count("primary")
+            return None
+        factories = self.session_factories
+        session = factories[next(self._turn) % len(factories)]()
+        if pinned_lsn is not None and not self._has_replayed(session, pinned_lsn):
+            session.close()
+            self._count("primary")
+            return None
+        self._count("replica")
+        return session
+
+    def stats(self) -> list[tuple[dict, int]]:
+        with self._lock:
+            counters = dict(self.counters)
+        return [({"target": target}, count) for target, count in counters.items()]
+
+
+replica_router = ReplicaRouter(None, create_cache())
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_orm_write(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_writes(session: Session) -> None:
+    session.info.pop("wrote", None)
+    session.info.pop("connection", None)
+
+
+@event.listens_for(Session, "after_begin")
+def _remember_connection(session: Session, transaction, connection) -> None:
+    session.info["connection"] = connection
+
+
+def _current_wal_lsn(connection) -> str | None:
+    if connection is None or connection.dialect.name != "postgresql":
+        return None
+    try:
+        return connection.scalar(text("SELECT pg_current_wal_lsn()::text"))
+    except Exception as e:
+        logging.warning("Could not read primary WAL position. Error: %s", e)
+        return None
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer(session: Session) -> None:
+    connection = session.info.pop("connection", None)
+    user_id = session.info.get("user_id")
+    if not session.info.pop("wrote", False) or user_id is None or not replica_router.session_factories:
+        return
+    # The session releases its connection only after this event, so the position is read on it,
+    # after the commit record, without a second checkout from a possibly exhausted pool
+    replica_router.pin(user_id, _current_wal_lsn(connection))
+
+
+def get_primary_db(current_user: CurrentUser, db: DbSession) -> Session:
+    """The primary session, tagged so a commit that writes pins the user's reads to it"""
+    db.info["user_id"] = current_user.get_uuid()
+    return db
+
+
+def get_read_db(current_user: CurrentUser, db: DbSession) -> Iterator[Session]:
+    # The primary session has not connected yet, so leaving it unused costs nothing
+    replica = replica_router.replica_session(current_user.get_uuid())
+    if replica is None:
+        yield db
+        return
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+
+PrimaryDbSession = Annotated[Session, Depends(get_primary_db)]
+ReadDbSession = Annotated[Session, Depends(get_read_db)]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 import uuid
 from datetime import datetime, timezone
@@ -22,7 +22,33 @@ class Todo(Base):
     is_completed = Column(Boolean, nullable=False, default=False)
     created_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
     completed_at = Column(DateTime, nullable=True)
+    # Set by the todos service after it takes the user's row lock, so a user's changes are stamped in commit order
+    updated_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc),
+                        onupdate=lambda: datetime.now(timezone.utc))
     priority = Column(Enum(Priority), nullable=False, default=Priority.Medium)
 
+    __table_args__ = (
+        Index('ix_todos_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        Index('ix_todos_user_id_is_completed_due_date', 'user_id', 'is_completed', 'due_date'),
+        Index('ix_todos_user_id_priority', 'user_id', 'priority'),
+        Index('ix_todos_user_id_updated_at_id', 'user_id', 'updated_at', 'id'),
+    )
+
+    def __repr__(self):
+        return f"<Todo(description='{self.description}', due_date='{self.due_date}', is_completed={self.is_completed})>"
+
+
+class TodoTombstone(Base):
+    """Records a deleted todo so GET /todos/changes can report the deletion"""
+    __tablename__ = 'todo_tombstones'
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index('ix_todo_tombstones_user_id_deleted_at_id', 'user_id', 'deleted_at', 'id'),
+    )
+
     def __repr__(self):
-        return f"<Todo(description='{self.description}', due_date='{self.due_date}', is_completed={self.is_completed})>"
\ No newline at end of file
+        return f"<TodoTombstone(id='{self.id}', deleted_at='{self.deleted_at}')>"
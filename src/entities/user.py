@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from ..database.core import Base 
@@ -11,6 +11,8 @@ class User(Base):
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
     password_hash = Column(String, nullable=False)
+    # Bumped in the same transaction as every write to the user's todos
+    todos_version = Column(Integer, nullable=False, default=0, server_default='0')
 
     def __repr__(self):
         return f"<User(email='{self.email}', first_name='{self.first_name}', last_name='{self.last_name}')>"
\ No newline at end of file
@@ -0,0 +1,28 @@
+import hashlib
+
+from fastapi import Response
+
+# Part of every ETag so a change to the response format invalidates old ones
+REPRESENTATION_VERSION = "1"
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256(":".join(map(str, (REPRESENTATION_VERSION, *parts))).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison as required for If-None-Match (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
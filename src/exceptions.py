@@ -13,6 +13,18 @@ class TodoCreationError(TodoError):
     def __init__(self, error: str):
         super().__init__(status_code=500, detail=f"Failed to create todo: {error}")
 
+class TodoBatchError(TodoError):
+    def __init__(self, error: str):
+        super().__init__(status_code=500, detail=f"Failed to apply batch: {error}")
+
+class InvalidCursorError(TodoError):
+    def __init__(self):
+        super().__init__(status_code=400, detail="Invalid pagination cursor")
+
+class InvalidCheckpointError(TodoError):
+    def __init__(self):
+        super().__init__(status_code=400, detail="Invalid sync checkpoint")
+
 class UserError(HTTPException):
     """Base exception for user-related errors"""
     pass
@@ -33,3 +45,16 @@ class InvalidPasswordError(UserError):
 class AuthenticationError(HTTPException):
     def __init__(self, message: str = "Could not validate user"):
         super().__init__(status_code=401, detail=message)
+
+class ServiceUnavailableError(HTTPException):
+    def __init__(self, message: str = "Service temporarily unavailable", retry_after: int = 1):
+        super().__init__(status_code=503, detail=message, headers={"Retry-After": str(retry_after)})
+
+class TooManyRequestsError(HTTPException):
+    def __init__(self, message: str = "Too many requests", retry_after: int = 1):
+        super().__init__(status_code=429, detail=message, headers={"Retry-After": str(retry_after)})
+
+class InternalAuthError(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=401, detail="Invalid internal API token",
+                         headers={"WWW-Authenticate": "Bearer"})
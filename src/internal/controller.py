@@ -0,0 +1,66 @@
+import hmac
+import os
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from ..database.core import get_pool_status
+from ..exceptions import InternalAuthError
+from ..monitoring import render_metrics
+from ..startup import startup_state
+from ..timing import route_timings
+
+# /internal/* and /metrics expose SQL text, pool state and per-route timings, so they are opt-in
+INTERNAL_ENDPOINTS_ENABLED = os.getenv('INTERNAL_ENDPOINTS_ENABLED', 'false').lower() == 'true'
+INTERNAL_API_TOKEN = os.getenv('INTERNAL_API_TOKEN')
+
+
+def require_internal_token(authorization: Annotated[str | None, Header()] = None) -> None:
+    scheme, _, token = (authorization or "").partition(" ")
+    if (not INTERNAL_API_TOKEN or scheme.lower() != "bearer"
+            or not hmac.compare_digest(token.encode(), INTERNAL_API_TOKEN.encode())):
+        raise InternalAuthError()
+
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["Internal"],
+    dependencies=[Depends(require_internal_token)]
+)
+
+# Prometheus scrapes /metrics by default, so this one lives outside /internal;
+# configure the scrape job with authorization credentials set to INTERNAL_API_TOKEN
+metrics_router = APIRouter(tags=["Internal"], dependencies=[Depends(require_internal_token)])
+
+health_router = APIRouter(
+    prefix="/health",
+    tags=["Internal"]
+)
+
+
+@router.get("/pool")
+def get_pool_stats():
+    return get_pool_status()
+
+
+@router.get("/timings")
+def get_route_timings():
+    return route_timings.snapshot()
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@health_router.get("/live")
+def get_liveness():
+    return {"status": "ok"}
+
+
+@health_router.get("/ready")
+def get_readiness():
+    # 503 until this worker's warm-up has finished, so load balancers hold traffic back
+    status_code = status.HTTP_200_OK if startup_state.ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(startup_state.snapshot(), status_code=status_code)
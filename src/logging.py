@@ -1,9 +1,22 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from enum import StrEnum
+from logging.handlers import QueueHandler, QueueListener
 
 
 LOG_FORMAT_DEBUG = "%(levelname)s:%(message)s:%(pathname)s:%(funcName)s:%(lineno)d"
 
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_QUEUE = os.getenv('LOG_QUEUE', 'true').lower() == 'true'
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '1'))
+
 
 class LogLevels(StrEnum):
     info = "INFO"
@@ -12,16 +25,138 @@ class LogLevels(StrEnum):
     debug = "DEBUG"
 
 
-def configure_logging(log_level: str = LogLevels.error):
-    log_level = str(log_level).upper()
-    log_levels = [level.value for level in LogLevels]
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
 
-    if log_level not in log_levels:
-        logging.basicConfig(level=LogLevels.error)
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed via `extra` are included"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener thread; drops them when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so the record goes as is and is
+        # formatted once, by the listener's handler, off the request thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_request_sampled: ContextVar[bool | None] = ContextVar("log_request_sampled", default=None)
+
+
+class RequestSamplingFilter(logging.Filter):
+    """Keeps info and debug records only for requests picked by LogSamplingMiddleware.
+
+    Warnings and errors always pass, as does anything logged outside a request.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.INFO or _request_sampled.get() is not False
+
+
+class LogSamplingMiddleware:
+    """Decides once per request whether its info logs are kept"""
+
+    def __init__(self, app, sample_rate: float = LOG_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_sampled.set(random.random() < self.sample_rate)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_sampled.reset(token)
+
+
+_listener: QueueListener | None = None
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_listener_after_fork() -> None:
+    """The listener thread does not survive fork: give the child its own queue and thread.
+
+    Records the parent had queued but not yet written stay with the parent.
+    """
+    global _listener
+    if _listener is None:
         return
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    for handler in logging.root.handlers:
+        if isinstance(handler, QueueHandler):
+            handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
 
-    if log_level == LogLevels.debug:
-        logging.basicConfig(level=log_level, format=LOG_FORMAT_DEBUG)
+os.register_at_fork(after_in_child=_restart_listener_after_fork)
+
+
+def configure_logging(log_level: str = LogLevels.error, log_format: str = LOG_FORMAT,
+                      use_queue: bool = LOG_QUEUE, sample_rate: float = LOG_SAMPLE_RATE):
+    """Log to stderr, by default through a queue drained by a background thread.
+
+    Like ``logging.basicConfig`` this does nothing when the root logger
+    already has handlers.
+    """
+    global _listener
+    if logging.root.handlers:
         return
 
-    logging.basicConfig(level=log_level)
\ No newline at end of file
+    log_level = str(log_level).upper()
+    log_levels = [level.value for level in LogLevels]
+    if log_level not in log_levels:
+        log_level = LogLevels.error
+
+    handler = logging.StreamHandler()
+    if log_format == "json":
+        handler.setFormatter(JsonFormatter())
+    elif log_level == LogLevels.debug:
+        handler.setFormatter(logging.Formatter(LOG_FORMAT_DEBUG))
+    else:
+        handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+
+    if use_queue:
+        _listener = QueueListener(queue.Queue(LOG_QUEUE_SIZE), handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        handler = NonBlockingQueueHandler(_listener.queue)
+    if sample_rate < 1:
+        handler.addFilter(RequestSamplingFilter())
+
+    logging.basicConfig(level=log_level, handlers=[handler])
@@ -1,17 +1,27 @@
-from .database.core import engine, Base
+from .database.core import database, Base
 from fastapi import FastAPI
 from .entities.todo import Todo  # Import models to register them
 from .entities.user import User  # Import models to register them
 from .api import register_routes
-from .logging import configure_logging, LogLevels
+from .logging import LogSamplingMiddleware, LOG_SAMPLE_RATE
+from .monitoring import MetricsMiddleware
+from .startup import lifespan
+from .timing import SERVER_TIMING_ENABLED, ServerTimingMiddleware
 
-configure_logging(LogLevels.info)
-
-app = FastAPI()
+# Logging, engines and warm-up start in the lifespan, not at import
+app = FastAPI(lifespan=lifespan)
 
 """ Only uncomment below to create new tables, 
 otherwise the tests will fail if not connected
 """
-# Base.metadata.create_all(bind=engine)
+# Base.metadata.create_all(bind=database.engine)
 
 register_routes(app)
+app.add_middleware(MetricsMiddleware)
+
+if SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
+# Outermost, so every log line of a request shares one sampling decision
+if LOG_SAMPLE_RATE < 1:
+    app.add_middleware(LogSamplingMiddleware)
@@ -0,0 +1,97 @@
+import bisect
+import threading
+
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else format(bound, "g")
+
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram of durations in seconds"""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+            if value > self._max:
+                self._max = value
+
+    def percentile(self, quantile: float) -> float:
+        """Estimate a quantile by interpolating inside the matching bucket"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            maximum = self._max
+        if total == 0:
+            return 0.0
+        rank = quantile * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else maximum
+                return min(lower + (upper - lower) * (rank - seen) / count, maximum)
+            seen += count
+        return maximum
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            total_sum = self._sum
+            maximum = self._max
+        cumulative = {}
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            cumulative[format_bound(bound)] = running
+        return {
+            "count": total,
+            "sum": total_sum,
+            "max": maximum,
+            "buckets": cumulative,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+def prometheus_metric(name: str, help_text: str, samples: list[tuple[dict, float]],
+                       metric_type: str = "counter") -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    lines.extend(f"{name}{_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+
+def prometheus_histogram(name: str, help_text: str, samples: list[tuple[dict, dict]]) -> list[str]:
+    """Render Histogram snapshots in the Prometheus text exposition format"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, snapshot in samples:
+        for bound, count in snapshot["buckets"].items():
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {count}")
+        lines.append(f"{name}_sum{_labels(labels)} {snapshot['sum']}")
+        lines.append(f"{name}_count{_labels(labels)} {snapshot['count']}")
+    return lines
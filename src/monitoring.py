@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import defaultdict
+
+from fastapi import APIRouter
+
+from .auth.hashing import password_pool
+from .auth.token_cache import token_cache
+from .database.core import get_pool_status, statement_stats
+from .database.replicas import replica_router
+from .metrics import Histogram, prometheus_metric, prometheus_histogram
+from .rate_limiter import login_limiter
+
+UNMATCHED = "unmatched"
+
+
+class RequestMetrics:
+    """Request counts and latencies per router registered in register_routes"""
+
+    def __init__(self):
+        self._routers: dict = {}
+        self._requests: dict[tuple[str, str, int], int] = defaultdict(int)
+        self._latency: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def add_router(self, name: str, router: APIRouter) -> None:
+        for route in router.routes:
+            self._routers[route.endpoint] = name
+
+    def router_name(self, scope) -> str:
+        # Starlette leaves the matched endpoint, not the route, in the scope
+        return self._routers.get(scope.get("endpoint"), UNMATCHED)
+
+    def observe(self, router: str, method: str, status_code: int, seconds: float) -> None:
+        with self._lock:
+            self._requests[(router, method, status_code)] += 1
+            histogram = self._latency.setdefault(router, Histogram())
+        histogram.observe(seconds)
+
+    def requests(self) -> list[tuple[dict, int]]:
+        with self._lock:
+            requests = dict(self._requests)
+        return [({"router": router, "method": method, "status": status}, count)
+                for (router, method, status), count in sorted(requests.items())]
+
+    def latency(self) -> list[tuple[dict, dict]]:
+        with self._lock:
+            latency = dict(self._latency)
+        return [({"router": router}, histogram.snapshot()) for router, histogram in sorted(latency.items())]
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """Counts requests per router and the statements each one issues"""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with statement_stats.track_request(f"{scope['method']} {scope['path']}"):
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                self.metrics.observe(self.metrics.router_name(scope), scope["method"], status_code,
+                                     time.perf_counter() - started)
+
+
+def render_metrics() -> str:
+    lines = []
+    lines += prometheus_metric("http_requests_total", "HTTP requests by router, method and status.",
+                               request_metrics.requests())
+    lines += prometheus_histogram("http_request_duration_seconds", "HTTP request latency by router.",
+                                  request_metrics.latency())
+
+    statements = statement_stats.snapshot()
+    lines += prometheus_histogram("db_statement_duration_seconds", "SQL statement latency by normalized statement.",
+                                  [({"statement": sql}, snapshot) for sql, snapshot in statements["statements"].items()])
+    lines += prometheus_histogram("db_statements_per_request", "SQL statements issued per HTTP request.",
+                                  [({}, statements["per_request"])])
+    lines += prometheus_metric("db_slow_queries_total", "Statements slower than DB_SLOW_QUERY_MS.",
+                               [({}, statements["slow_queries"])])
+    lines += prometheus_metric("db_repeated_statements_total",
+                               "Requests that repeated one statement DB_REPEATED_STATEMENT_THRESHOLD times or more.",
+                               [({}, statements["repeated_statements"])])
+
+    pools = get_pool_status()
+    lines += prometheus_metric("db_pool_checked_out", "Connections currently checked out.",
+                               [({"engine": name}, pool.get("checked_out", 0)) for name, pool in pools.items()],
+                               metric_type="gauge")
+    lines += prometheus_metric("db_pool_timeouts_total", "Checkouts that timed out waiting for a connection.",
+                               [({"engine": name}, pool["timeouts"]) for name, pool in pools.items()])
+    lines += prometheus_histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.",
+                                  [({"engine": name}, pool["checkout_wait"]) for name, pool in pools.items()])
+    lines += prometheus_metric("db_read_routing_total", "Read-only requests by the database they were sent to.",
+                               replica_router.stats())
+    lines += prometheus_metric("rate_limit_decisions_total", "Login rate limit checks by limit and result.",
+                               login_limiter.stats())
+
+    tokens = token_cache.stats()
+    lines += prometheus_metric("token_cache_lookups_total", "Bearer token cache lookups by result.",
+                               [({"result": "hit"}, tokens["hits"]),
+                                ({"result": "negative_hit"}, tokens["negative_hits"]),
+                                ({"result": "miss"}, tokens["misses"])])
+
+    passwords = password_pool.stats()
+    lines += prometheus_histogram("password_hash_wait_seconds", "Time password hashes spent queued for a worker.",
+                                  [({}, passwords["wait_time"])])
+    lines += prometheus_metric("password_hash_rejected_total", "Password hashes rejected because the queue was full.",
+                               [({}, passwords["rejected"])])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Callable
+from uuid import uuid4
+
+REDIS_URL = os.getenv('REDIS_URL')
+
+Handler = Callable[[Any], None]
+
+
+class LocalPubSub:
+    """In-process publish/subscribe; reaches only the current worker"""
+
+    def __init__(self):
+        self._handlers: dict[str, list[Handler]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        with self._lock:
+            self._handlers[channel].append(handler)
+
+    def unsubscribe(self, channel: str, handler: Handler) -> None:
+        with self._lock:
+            if handler in self._handlers[channel]:
+                self._handlers[channel].remove(handler)
+
+    def publish(self, channel: str, message: Any) -> None:
+        self._deliver(channel, message)
+
+    def reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def _deliver(self, channel: str, message: Any) -> None:
+        with self._lock:
+            handlers = list(self._handlers[channel])
+        for handler in handlers:
+            try:
+                handler(message)
+            except Exception as e:
+                logging.error("Subscriber on channel %s failed. Error: %s", channel, e)
+
+
+class RedisPubSub(LocalPubSub):
+    """Fans messages out to every worker through Redis PUBLISH/SUBSCRIBE.
+
+    Messages are delivered to local subscribers immediately and tagged with
+    this node's id, so the copy echoed back by Redis is skipped. Messages
+    must be JSON serializable.
+    """
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+        self.node_id = uuid4().hex
+        self._channels: set[str] = set()
+        self._pubsub = None
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        super().subscribe(channel, handler)
+        with self._lock:
+            self._channels.add(channel)
+            if self._pubsub is not None:
+                self._pubsub.subscribe(channel)
+        self._ensure_listener()
+
+    def publish(self, channel: str, message: Any) -> None:
+        self._deliver(channel, message)
+        try:
+            self.client.publish(channel, json.dumps({"origin": self.node_id, "message": message}))
+        except Exception as e:
+            logging.error("Failed to publish to channel %s. Error: %s", channel, e)
+
+    def reset_after_fork(self) -> None:
+        """A forked worker needs its own node id, or workers would skip each other's
+        messages, and its own listener, since the parent's thread did not survive"""
+        super().reset_after_fork()
+        self.node_id = uuid4().hex
+        self._pubsub = None
+        self._thread = None
+        if self._channels:
+            self._ensure_listener()
+
+    def _ensure_listener(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(*self._channels)
+            self._thread = threading.Thread(target=self._listen, args=(self._pubsub,),
+                                            name="redis-pubsub", daemon=True)
+            self._thread.start()
+
+    def _listen(self, pubsub) -> None:
+        for raw in pubsub.listen():
+            if raw.get("type") != "message":
+                continue
+            channel = raw["channel"]
+            channel = channel.decode() if isinstance(channel, bytes) else channel
+            try:
+                envelope = json.loads(raw["data"])
+            except (TypeError, ValueError):
+                logging.warning("Ignoring malformed message on channel %s", channel)
+                continue
+            if envelope.get("origin") != self.node_id:
+                self._deliver(channel, envelope.get("message"))
+
+
+def redis_client(url: str):
+    try:
+        import redis
+    except ImportError as e:
+        raise RuntimeError("REDIS_URL is set but the 'redis' package is not installed") from e
+    return redis.Redis.from_url(url)
+
+
+def create_pubsub(url: str | None = REDIS_URL) -> LocalPubSub:
+    return RedisPubSub(redis_client(url)) if url else LocalPubSub()
+
+
+pubsub = create_pubsub()
+os.register_at_fork(after_in_child=pubsub.reset_after_fork)
@@ -1,5 +1,100 @@
+import hashlib
+import math
+import os
+import threading
+import time
+
+from fastapi import Request
+from limits import parse
+from limits.errors import ConfigurationError
+from limits.aio.strategies import STRATEGIES
+from limits.strategies import STRATEGIES as SYNC_STRATEGIES
+from limits.storage import storage_from_string
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from .exceptions import TooManyRequestsError
+
+# memory:// is per worker; point every worker at one redis:// (or any other
+# backend the limits package supports) to enforce limits across all of them
+RATE_LIMIT_STORAGE_URI = os.getenv('RATE_LIMIT_STORAGE_URI', 'memory://')
+RATE_LIMIT_STRATEGY = os.getenv('RATE_LIMIT_STRATEGY', 'moving-window')
+LOGIN_LIMIT_PER_ACCOUNT = os.getenv('LOGIN_LIMIT_PER_ACCOUNT', '10/minute')
+LOGIN_LIMIT_PER_IP = os.getenv('LOGIN_LIMIT_PER_IP', '30/minute')
+
+
+def rate_limit_storage(uri: str):
+    try:
+        return storage_from_string(uri)
+    except ConfigurationError as e:
+        raise RuntimeError(f"RATE_LIMIT_STORAGE_URI {uri!r} is not usable: {e}") from e
+
+
+# Fail at import with the variable's name rather than deep inside slowapi;
+# the login limiter needs the async client of the same backend as well
+rate_limit_storage(RATE_LIMIT_STORAGE_URI)
+rate_limit_storage(f"async+{RATE_LIMIT_STORAGE_URI}")
+limiter = Limiter(key_func=get_remote_address, storage_uri=RATE_LIMIT_STORAGE_URI, strategy=RATE_LIMIT_STRATEGY)
+
+
+class LoginRateLimiter:
+    """Per-IP and per-account limits on login attempts, checked before any bcrypt work.
+
+    Accounts are keyed by a digest of the normalized username so emails
+    never reach the shared storage. The IP limit is checked first; a
+    request it rejects does not count against the account.
+    """
+
+    def __init__(self, storage_uri: str = RATE_LIMIT_STORAGE_URI, strategy: str = RATE_LIMIT_STRATEGY,
+                 per_account: str = LOGIN_LIMIT_PER_ACCOUNT, per_ip: str = LOGIN_LIMIT_PER_IP):
+        self.storage_uri = storage_uri
+        self.strategy_name = strategy
+        self.limits = {"ip": parse(per_ip), "account": parse(per_account)}
+        self.counters = {(scope, result): 0 for scope in self.limits for result in ("allowed", "rejected")}
+        self.reset_after_fork()
+
+    def reset_after_fork(self) -> None:
+        """Storage clients hold the parent's locks and connections; build fresh ones"""
+        self.storage = rate_limit_storage(f"async+{self.storage_uri}")
+        self.strategy = STRATEGIES[self.strategy_name](self.storage)
+        self._lock = threading.Lock()
+
+    def _count(self, scope: str, result: str) -> None:
+        with self._lock:
+            self.counters[(scope, result)] += 1
+
+    async def _hit(self, scope: str, key: str) -> None:
+        limit = self.limits[scope]
+        if await self.strategy.hit(limit, "login", scope, key):
+            self._count(scope, "allowed")
+            return
+        self._count(scope, "rejected")
+        window = await self.strategy.get_window_stats(limit, "login", scope, key)
+        retry_after = max(math.ceil(window.reset_time - time.time()), 1)
+        raise TooManyRequestsError("Too many login attempts", retry_after=retry_after)
+
+    async def check(self, request: Request, username: str) -> None:
+        await self._hit("ip", get_remote_address(request))
+        await self._hit("account", hashlib.sha256(username.strip().lower().encode()).hexdigest())
+
+    async def reset(self) -> None:
+        await self.storage.reset()
+
+    def stats(self) -> list[tuple[dict, int]]:
+        with self._lock:
+            counters = dict(self.counters)
+        return [({"limit": f"login_{scope}", "result": result}, count)
+                for (scope, result), count in counters.items()]
+
+
+login_limiter = LoginRateLimiter()
+
+
+def _reset_limiters_after_fork() -> None:
+    # slowapi has no public way to rebuild its storage, so swap the attributes its constructor sets
+    limiter._storage = rate_limit_storage(RATE_LIMIT_STORAGE_URI)
+    limiter._limiter = SYNC_STRATEGIES[RATE_LIMIT_STRATEGY](limiter._storage)
+    login_limiter.reset_after_fork()
+
 
-limiter = Limiter(key_func=get_remote_address)
\ No newline at end of file
+os.register_at_fork(after_in_child=_reset_limiters_after_fork)
@@ -0,0 +1,329 @@
+"""Pre-fork server: one listening socket shared by several uvicorn worker processes.
+
+Usage:
+    python -m src.serve --host 0.0.0.0 --port 8000 [--workers N] [--preload]
+
+The worker count defaults to WEB_CONCURRENCY, else the CPUs this container
+may use. With --preload the app is imported once in the master and forked,
+so workers start faster and share its memory copy-on-write; modules that
+hold connections, threads or locks reset themselves after fork through
+os.register_at_fork.
+
+Signals to the master:
+    SIGTERM, SIGINT  finish in-flight requests, then exit
+    SIGHUP           start a new set of workers, then stop the old ones
+                     gracefully; new code is picked up only without --preload
+    SIGUSR1          log each worker's pid, age and heartbeat
+Workers that exit or stop heartbeating for --worker-timeout seconds are replaced.
+
+With more than one worker, state that must be shared (todo event streams,
+replica pins, rate limits) needs Redis; serve refuses to start while any of
+it is process local unless --allow-process-local-state is given.
+"""
+import argparse
+import logging
+import math
+import os
+import signal
+import socket
+import tempfile
+import time
+from dataclasses import dataclass
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+# The master imports nothing from the app (not even its logging) unless
+# --preload asks it to, so workers started on SIGHUP load the current code
+APP = "src.main:app"
+WORKER_INDEX_ENV = "SERVE_WORKER_INDEX"
+# A worker exits with this when the app fails to start; the master then gives up instead of respawning forever
+WORKER_BOOT_ERROR = 3
+TICK_SECONDS = 0.2
+
+SERVE_GRACEFUL_TIMEOUT = float(os.getenv('SERVE_GRACEFUL_TIMEOUT', '30'))
+SERVE_WORKER_TIMEOUT = float(os.getenv('SERVE_WORKER_TIMEOUT', '30'))
+
+
+def available_cpus(cgroup_root: str = "/sys/fs/cgroup") -> int:
+    """CPUs this process may use: the affinity mask, capped by a cgroup CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota_files = (
+        (os.path.join(cgroup_root, "cpu.max"), None),  # cgroup v2: "<quota|max> <period>"
+        (os.path.join(cgroup_root, "cpu", "cpu.cfs_quota_us"), os.path.join(cgroup_root, "cpu", "cpu.cfs_period_us")),
+    )
+    for quota_path, period_path in quota_files:
+        try:
+            with open(quota_path) as quota_file:
+                values = quota_file.read().split()
+            if period_path:
+                with open(period_path) as period_file:
+                    values.append(period_file.read().strip())
+        except OSError:
+            continue
+        quota, period = values[0], values[1]
+        if quota not in ("max", "-1"):
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+        break
+    return cpus
+
+
+def default_workers() -> int:
+    return int(os.getenv("WEB_CONCURRENCY") or available_cpus())
+
+
+def process_local_state() -> list[str]:
+    """Settings under which a feature only sees the worker it runs in.
+
+    Read from the environment with the same defaults as the modules that
+    use them, so the check does not import the app into the master.
+    """
+    redis_url = os.getenv("REDIS_URL")
+    cache_backend = os.getenv("CACHE_BACKEND", "memory")
+    replica_urls = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    rate_limit_storage_uri = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+
+    problems = []
+    if not redis_url:
+        problems.append("REDIS_URL is not set: /todos/stream only receives changes made on its own worker")
+    if replica_urls and cache_backend != "redis":
+        problems.append(f"CACHE_BACKEND={cache_backend}: read-your-writes pins to the primary are per worker")
+    if rate_limit_storage_uri.startswith("memory://"):
+        problems.append("RATE_LIMIT_STORAGE_URI=memory://: every worker allows the full rate limit")
+    return problems
+
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn server that touches a heartbeat file from its event loop"""
+
+    def __init__(self, config: uvicorn.Config, heartbeat: str):
+        super().__init__(config)
+        self.heartbeat = heartbeat
+
+    async def on_tick(self, counter: int) -> bool:
+        # main_loop ticks every 0.1 s; a blocked event loop stops the heartbeat
+        if counter % 10 == 0:
+            os.utime(self.heartbeat)
+        return await super().on_tick(counter)
+
+
+@dataclass
+class Worker:
+    index: int
+    pid: int
+    heartbeat: str
+    started_at: float
+    stopping_since: float | None = None
+
+
+class Arbiter:
+    """Binds the socket, forks the workers and keeps their number up"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.app = APP
+        self.socket: socket.socket | None = None
+        self.workers: dict[int, Worker] = {}
+        self.signals: list[int] = []
+        self.shutting_down = False
+
+    def bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET6 if ":" in self.args.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.args.host, self.args.port))
+        sock.listen(self.args.backlog)
+        sock.set_inheritable(True)
+        return sock
+
+    def run(self) -> int:
+        logging.basicConfig(level=logging.INFO)
+        if self.args.workers > 1:
+            problems = process_local_state()
+            for problem in problems:
+                logging.warning("%s workers share no state: %s", self.args.workers, problem)
+            if problems and not self.args.allow_process_local_state:
+                logging.error("Refusing to start %s workers with process-local state; configure Redis, run "
+                              "--workers 1, or pass --allow-process-local-state", self.args.workers)
+                return WORKER_BOOT_ERROR
+        self.socket = self.bind()
+        if self.args.preload:
+            self.app = import_from_string(APP)
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1):
+            signal.signal(signum, lambda signum, frame: self.signals.append(signum))
+        logging.info("Master %s listening on %s:%s with %s workers%s", os.getpid(), self.args.host,
+                     self.args.port, self.args.workers, " (preloaded)" if self.args.preload else "")
+
+        exit_code = 0
+        try:
+            while not self.shutting_down:
+                self.handle_signals()
+                exit_code = self.reap() or exit_code
+                if self.shutting_down:
+                    break
+                self.check_heartbeats()
+                self.spawn_missing()
+                time.sleep(TICK_SECONDS)
+        finally:
+            self.stop_all()
+            self.socket.close()
+            logging.info("Master %s stopped", os.getpid())
+        return exit_code
+
+    def handle_signals(self) -> None:
+        while self.signals:
+            signum = self.signals.pop(0)
+            if signum in (signal.SIGTERM, signal.SIGINT):
+                logging.info("Received %s, shutting down", signal.Signals(signum).name)
+                self.shutting_down = True
+            elif signum == signal.SIGHUP:
+                logging.info("Received SIGHUP, replacing workers")
+                old_workers = [worker for worker in self.workers.values() if worker.stopping_since is None]
+                for worker in old_workers:
+                    self.spawn(worker.index)
+                for worker in old_workers:
+                    self.stop(worker)
+            elif signum == signal.SIGUSR1:
+                self.report()
+
+    def report(self) -> None:
+        now = time.monotonic()
+        for worker in sorted(self.workers.values(), key=lambda worker: worker.index):
+            logging.info("Worker %s pid=%s age=%.0fs heartbeat=%.1fs ago%s", worker.index, worker.pid,
+                         now - worker.started_at, self.heartbeat_age(worker),
+                         " stopping" if worker.stopping_since is not None else "")
+
+    def spawn_missing(self) -> None:
+        running = {worker.index for worker in self.workers.values() if worker.stopping_since is None}
+        for index in range(self.args.workers):
+            if index not in running:
+                self.spawn(index)
+
+    def spawn(self, index: int) -> None:
+        fd, heartbeat = tempfile.mkstemp(prefix=f"serve-worker-{index}-")
+        os.close(fd)
+        pid = os.fork()
+        if pid == 0:
+            self.run_worker(index, heartbeat)
+        self.workers[pid] = Worker(index, pid, heartbeat, time.monotonic())
+        logging.info("Started worker %s (pid %s)", index, pid)
+
+    def run_worker(self, index: int, heartbeat: str) -> None:
+        """Child side of the fork; never returns"""
+        exit_code = 0
+        try:
+            os.environ[WORKER_INDEX_ENV] = str(index)
+            # Leave the root logger to the app's lifespan, which configures it only when it has no handlers
+            for handler in logging.root.handlers[:]:
+                logging.root.removeHandler(handler)
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1):
+                signal.signal(signum, signal.SIG_DFL)
+            config = uvicorn.Config(self.app, lifespan="on", timeout_graceful_shutdown=self.args.graceful_timeout,
+                                    log_level="info")
+            server = WorkerServer(config, heartbeat)
+            server.run(sockets=[self.socket])
+            if not server.started:
+                exit_code = WORKER_BOOT_ERROR
+        except BaseException:
+            logging.exception("Worker %s failed", index)
+            exit_code = WORKER_BOOT_ERROR
+        finally:
+            # os._exit skips atexit; drain the app's log queue first
+            from .logging import stop_logging
+            stop_logging()
+            os._exit(exit_code)
+
+    def heartbeat_age(self, worker: Worker) -> float:
+        try:
+            last_beat = os.stat(worker.heartbeat).st_mtime
+        except OSError:
+            return math.inf
+        # Before the first tick the file still carries its creation time
+        return time.time() - last_beat
+
+    def check_heartbeats(self) -> None:
+        now = time.monotonic()
+        for worker in list(self.workers.values()):
+            if worker.stopping_since is not None:
+                if now - worker.stopping_since > self.args.graceful_timeout:
+                    logging.warning("Worker %s (pid %s) did not stop in time, killing it", worker.index, worker.pid)
+                    self.kill(worker, signal.SIGKILL)
+            elif self.heartbeat_age(worker) > self.args.worker_timeout:
+                logging.error("Worker %s (pid %s) stopped heartbeating, killing it", worker.index, worker.pid)
+                self.kill(worker, signal.SIGKILL)
+                worker.stopping_since = now
+
+    def kill(self, worker: Worker, signum: int) -> None:
+        try:
+            os.kill(worker.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def stop(self, worker: Worker) -> None:
+        worker.stopping_since = time.monotonic()
+        self.kill(worker, signal.SIGTERM)
+
+    def reap(self) -> int:
+        """Collect exited workers; returns a non-zero exit code when one failed to boot"""
+        exit_code = 0
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return exit_code
+            if pid == 0:
+                return exit_code
+            worker = self.workers.pop(pid, None)
+            if worker is None:
+                continue
+            os.unlink(worker.heartbeat)
+            code = os.waitstatus_to_exitcode(status)
+            if worker.stopping_since is not None:
+                logging.info("Worker %s (pid %s) stopped", worker.index, pid)
+            elif code == WORKER_BOOT_ERROR:
+                logging.error("Worker %s (pid %s) failed to boot, shutting down", worker.index, pid)
+                self.shutting_down = True
+                exit_code = WORKER_BOOT_ERROR
+            else:
+                logging.warning("Worker %s (pid %s) exited with %s, replacing it", worker.index, pid, code)
+
+    def stop_all(self) -> None:
+        for worker in list(self.workers.values()):
+            if worker.stopping_since is None:
+                self.stop(worker)
+        deadline = time.monotonic() + self.args.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(TICK_SECONDS / 2)
+        for worker in list(self.workers.values()):
+            self.kill(worker, signal.SIGKILL)
+        while self.workers:
+            self.reap()
+            time.sleep(TICK_SECONDS / 2)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the API with a pre-fork pool of uvicorn workers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="worker processes (default: WEB_CONCURRENCY, else the available CPUs)")
+    parser.add_argument("--preload", action="store_true", help="import the app in the master before forking")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--graceful-timeout", type=float, default=SERVE_GRACEFUL_TIMEOUT,
+                        help="seconds a stopping worker may spend finishing requests")
+    parser.add_argument("--worker-timeout", type=float, default=SERVE_WORKER_TIMEOUT,
+                        help="seconds without a heartbeat before a worker is killed and replaced")
+    parser.add_argument("--allow-process-local-state", action="store_true",
+                        help="start several workers even though streams, replica pins or rate limits are per worker")
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    raise SystemExit(Arbiter(parse_args()).run())
+
+
+if __name__ == "__main__":
+    main()
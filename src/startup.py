@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager, suppress
+from datetime import timedelta
+from uuid import uuid4
+
+import httpx
+from fastapi import FastAPI
+
+from .auth.hashing import password_pool
+from .auth.service import create_access_token, get_password_hash
+from .database.core import database
+from .logging import configure_logging, LogLevels
+
+STARTUP_WARMUP = os.getenv('STARTUP_WARMUP', 'true').lower() == 'true'
+# Per engine, capped at DB_POOL_SIZE
+DB_POOL_WARM_CONNECTIONS = int(os.getenv('DB_POOL_WARM_CONNECTIONS', '2'))
+WARMUP_MAX_RETRY_DELAY = float(os.getenv('WARMUP_MAX_RETRY_DELAY', '30'))
+
+
+class StartupState:
+    """Warm-up progress of this worker, as reported by /health/ready"""
+
+    def __init__(self):
+        self.ready = False
+        self.error: str | None = None
+        self.timings_ms: dict[str, float] = {}
+
+    @contextmanager
+    def measure(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings_ms[name] = round((time.perf_counter() - started) * 1000, 3)
+
+    def snapshot(self) -> dict:
+        return {
+            "status": "ready" if self.ready else "failed" if self.error else "warming",
+            # Set by src.serve; identifies which worker answered a health check
+            "worker": os.getenv("SERVE_WORKER_INDEX"),
+            "pid": os.getpid(),
+            "error": self.error,
+            "timings_ms": dict(self.timings_ms),
+        }
+
+
+startup_state = StartupState()
+
+
+async def _warm_routes(app: FastAPI) -> None:
+    """Send the hot read routes one request each, as a user with no data"""
+    token = create_access_token("warm-up@localhost", uuid4(), timedelta(minutes=1))
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://warm-up", headers=headers) as client:
+        for path in ("/todos/", f"/todos/{uuid4()}", "/users/me"):
+            response = await client.get(path)
+            if response.status_code >= 500:
+                raise RuntimeError(f"GET {path} returned {response.status_code}")
+
+
+async def warm_up(app: FastAPI, state: StartupState = startup_state,
+                  connections: int = DB_POOL_WARM_CONNECTIONS) -> None:
+    """Open pool connections, run the first hash and the hot routes, then report ready.
+
+    Failures are retried with backoff; until one pass succeeds the worker
+    stays live but not ready.
+    """
+    delay = 1.0
+    while True:
+        try:
+            with state.measure("pool"):
+                await asyncio.to_thread(database.warm_pool, connections)
+                await database.warm_async_pool(connections)
+            with state.measure("password_hash"):
+                await password_pool.run_async(get_password_hash, "warm-up")
+            with state.measure("routes"):
+                await _warm_routes(app)
+        except Exception as e:
+            state.error = str(e)
+            logging.error("Warm-up failed, retrying in %.0f s. Error: %s", delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARMUP_MAX_RETRY_DELAY)
+            continue
+        state.error = None
+        state.ready = True
+        logging.info("Warm-up finished: %s", state.timings_ms)
+        return
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging(LogLevels.info)
+    with startup_state.measure("engines"):
+        database.start()
+
+    warm_up_task = None
+    if STARTUP_WARMUP:
+        # Serve (and answer liveness checks) while warming; readiness waits for it
+        warm_up_task = asyncio.create_task(warm_up(app))
+    else:
+        startup_state.ready = True
+    try:
+        yield
+    finally:
+        startup_state.ready = False
+        if warm_up_task is not None:
+            warm_up_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await warm_up_task
+        await database.dispose()
@@ -0,0 +1,182 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .metrics import Histogram
+
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+SERVER_TIMING_LOG = os.getenv('SERVER_TIMING_LOG', 'true').lower() == 'true'
+
+TOTAL = "total"
+
+
+class RequestTiming:
+    """Exclusive time per phase for one request.
+
+    Phases nest: time spent in an inner phase (say ``db`` inside ``orm``)
+    is charged to the inner phase only, so the phases add up to at most the
+    total. The object is shared by reference between the event loop and
+    the threadpool, which each run with a copy of the request's context.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self._stack: list[list] = []
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+            if self._stack:
+                self._stack[-1][1] += seconds
+
+    def push(self) -> None:
+        with self._lock:
+            self._stack.append([time.perf_counter(), 0.0])
+
+    def pop(self, name: str) -> None:
+        with self._lock:
+            started, inner = self._stack.pop()
+        self.record(name, time.perf_counter() - started - inner)
+        if inner:
+            with self._lock:
+                if self._stack:
+                    self._stack[-1][1] += inner
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def header_value(self) -> str:
+        metrics = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        metrics.append(f"{TOTAL};dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+_current: ContextVar[RequestTiming | None] = ContextVar("request_timing", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Charge the enclosed block to ``name``; a no-op outside a timed request"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    timing.push()
+    try:
+        yield
+    finally:
+        timing.pop(name)
+
+
+class RouteTimings:
+    """In-memory latency histograms per route and phase"""
+
+    def __init__(self):
+        self._histograms: dict[str, dict[str, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, phases: dict[str, float]) -> None:
+        with self._lock:
+            histograms = self._histograms.setdefault(route, {})
+            for name in phases:
+                if name not in histograms:
+                    histograms[name] = Histogram()
+        for name, seconds in phases.items():
+            histograms[name].observe(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            routes = {route: dict(histograms) for route, histograms in self._histograms.items()}
+        return {
+            route: {name: histogram.snapshot() for name, histogram in histograms.items()}
+            for route, histograms in routes.items()
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+route_timings = RouteTimings()
+
+
+def listen(engine: Engine) -> None:
+    """Charge statement execution on ``engine`` to the ``db`` phase"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("timing_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        timing = _current.get()
+        started = conn.info.get("timing_started")
+        if timing is not None and started:
+            timing.record("db", time.perf_counter() - started.pop())
+
+
+_route_paths: dict = {}
+
+
+def _route_name(scope) -> str:
+    # Starlette leaves the matched endpoint, not the route, in the scope
+    endpoint = scope.get("endpoint")
+    if endpoint is not None and endpoint not in _route_paths and "app" in scope:
+        for route in scope["app"].router.routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                _route_paths[endpoint] = route.path
+    return f"{scope['method']} {_route_paths.get(endpoint, 'unmatched')}"
+
+
+class ServerTimingMiddleware:
+    """Adds a Server-Timing header and records per-route phase histograms.
+
+    Pure ASGI so it adds no task or body buffering. The header is written
+    when the response starts; the histograms and the log line use the time
+    at which the body finished, which differs only for streamed responses.
+    """
+
+    def __init__(self, app, timings: RouteTimings = route_timings, log: bool = SERVER_TIMING_LOG):
+        self.app = app
+        self.timings = timings
+        self.log = log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.header_value().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = _route_name(scope)
+            phases = {**timing.phases, TOTAL: timing.elapsed()}
+            self.timings.observe(route, phases)
+            if self.log and logging.getLogger().isEnabledFor(logging.INFO):
+                timings_ms = {name: round(seconds * 1000, 2) for name, seconds in phases.items()}
+                fields = " ".join(f"{name}_ms={value}" for name, value in timings_ms.items())
+                logging.info('server_timing route="%s" status=%s %s', route, status_code, fields,
+                             extra={"route": route, "status": status_code, "timings_ms": timings_ms})
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+from uuid import UUID
+
+from ..cache import CACHE_TTL, create_cache
+from ..entities.todo import Todo, Priority
+from . import models
+
+DATETIME_FIELDS = ("due_date", "created_at", "completed_at")
+
+
+def todo_to_dict(todo: Todo) -> dict:
+    data = {
+        "id": str(todo.id),
+        "user_id": str(todo.user_id),
+        "description": todo.description,
+        "is_completed": todo.is_completed,
+        "priority": todo.priority.name,
+    }
+    for field in DATETIME_FIELDS:
+        value = getattr(todo, field)
+        data[field] = value.isoformat() if value is not None else None
+    return data
+
+
+def todo_from_dict(data: dict) -> Todo:
+    """Rebuild a detached Todo; it must not be added to a session"""
+    values = {
+        "id": UUID(data["id"]),
+        "user_id": UUID(data["user_id"]),
+        "description": data["description"],
+        "is_completed": data["is_completed"],
+        "priority": Priority[data["priority"]],
+    }
+    for field in DATETIME_FIELDS:
+        values[field] = datetime.fromisoformat(data[field]) if data[field] is not None else None
+    return Todo(**values)
+
+
+class TodoCache:
+    """Read-through cache of per-user todo lists and single todos.
+
+    Every key embeds the users.todos_version the caller read from the same
+    session as the rows, and every write bumps that version in its own
+    transaction. A write therefore moves readers to new keys on every
+    worker at once, and an entry never holds rows older than its version,
+    even when filled from a lagging replica. Nothing is deleted; every
+    entry is written with ``ttl``, so old versions expire (and fall out of
+    a MemoryCache's LRU sooner). Cache errors are logged and treated as
+    misses.
+    """
+
+    def __init__(self, cache, ttl: float = CACHE_TTL):
+        self.cache = cache
+        self.ttl = ttl
+
+    @staticmethod
+    def list_key(user_id: UUID, version: int, filters: models.TodoFilters, limit: int | None,
+                 cursor: str | None) -> str:
+        params = json.dumps([filters.model_dump(mode="json"), limit, cursor], sort_keys=True)
+        digest = hashlib.sha256(params.encode()).hexdigest()[:32]
+        return f"todos:{user_id}:v{version}:list:{digest}"
+
+    @staticmethod
+    def item_key(user_id: UUID, version: int, todo_id: UUID) -> str:
+        return f"todos:{user_id}:v{version}:item:{todo_id}"
+
+    def _get(self, key: str):
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            logging.error("Todo cache read failed for key %s. Error: %s", key, e)
+            return None
+
+    def _set(self, key: str, value) -> None:
+        try:
+            self.cache.set(key, value, self.ttl)
+        except Exception as e:
+            logging.error("Todo cache write failed for key %s. Error: %s", key, e)
+
+    def get_list(self, key: str) -> list[Todo] | None:
+        cached = self._get(key)
+        return None if cached is None else [todo_from_dict(data) for data in cached]
+
+    def set_list(self, key: str, todos: list[Todo]) -> None:
+        self._set(key, [todo_to_dict(todo) for todo in todos])
+
+    def get_item(self, key: str) -> Todo | None:
+        cached = self._get(key)
+        return None if cached is None else todo_from_dict(cached)
+
+    def set_item(self, key: str, todo: Todo) -> None:
+        self._set(key, todo_to_dict(todo))
+
+
+todo_cache = TodoCache(create_cache())
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, status
-from typing import List
+from fastapi import APIRouter, Query, Request, UploadFile, status
+from fastapi.responses import StreamingResponse
+from typing import Annotated, List
 from uuid import UUID
 
-from ..database.core import DbSession
+from ..database.replicas import PrimaryDbSession, ReadDbSession
 from . import  models
 from . import service
+from .events import todo_events
 from ..auth.service import CurrentUser
+from ..etag import CACHE_CONTROL, etag_matches, make_etag, not_modified
+from ..responses import model_response
 
 router = APIRouter(
     prefix="/todos",
@@ -13,30 +17,108 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=models.TodoResponse, status_code=status.HTTP_201_CREATED)
-def create_todo(db: DbSession, todo: models.TodoCreate, current_user: CurrentUser):
-    return service.create_todo(current_user, db, todo)
+def create_todo(db: PrimaryDbSession, todo: models.TodoCreate, current_user: CurrentUser):
+    return model_response(models.todo_response_adapter, service.create_todo(current_user, db, todo),
+                          status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/batch", response_model=models.TodoBatchResponse)
+def apply_todo_batch(db: PrimaryDbSession, batch: models.TodoBatchRequest, current_user: CurrentUser):
+    return service.apply_todo_batch(current_user, db, batch)
+
+
+@router.post("/import", response_model=models.TodoImportResult)
+def import_todos(db: PrimaryDbSession, file: UploadFile, current_user: CurrentUser,
+                 format: models.TodoFileFormat | None = None):
+    if format is None:
+        is_csv = (file.filename or "").lower().endswith(".csv") or file.content_type == "text/csv"
+        format = models.TodoFileFormat.csv if is_csv else models.TodoFileFormat.ndjson
+    return service.import_todos(current_user, db, file.file, format)
 
 
 @router.get("/", response_model=List[models.TodoResponse])
-def get_todos(db: DbSession, current_user: CurrentUser):
-    return service.get_todos(current_user, db)
+def get_todos(request: Request, db: ReadDbSession, current_user: CurrentUser,
+              params: Annotated[models.TodoListParams, Query()]):
+    version = service.get_todos_version(current_user, db)
+    etag = make_etag("todos", current_user.user_id, version, request.url.query)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+
+    todos = service.get_todos(current_user, db, filters=params, limit=params.limit, cursor=params.cursor,
+                              version=version)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    next_cursor = service.get_next_cursor(todos, params.limit, params)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return model_response(models.todo_list_adapter, todos, headers=headers)
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_todos(db: ReadDbSession, current_user: CurrentUser,
+                 format: models.TodoFileFormat = models.TodoFileFormat.ndjson):
+    def stream():
+        # The session dependency has already closed it by the time the body is sent,
+        # so the stream reopens it and must close it again when done
+        try:
+            yield from service.export_todos(current_user, db, format)
+        finally:
+            db.close()
+
+    media_type = "text/csv" if format == models.TodoFileFormat.csv else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type,
+                             headers={"Content-Disposition": f"attachment; filename=todos.{format}"})
+
+
+@router.get("/changes", response_model=models.TodoChanges)
+def get_todo_changes(request: Request, db: ReadDbSession, current_user: CurrentUser,
+                     params: Annotated[models.TodoChangesParams, Query()]):
+    """Todos changed and deleted since a checkpoint; call without one for the initial sync"""
+    version = service.get_todos_version(current_user, db)
+    etag = make_etag("todo-changes", current_user.user_id, version, request.url.query)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+
+    changes = service.get_todo_changes(current_user, db, since=params.since, limit=params.limit)
+    return model_response(models.todo_changes_adapter, changes,
+                          headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+@router.get("/stream", response_class=StreamingResponse)
+def stream_todo_events(current_user: CurrentUser):
+    """Server-sent events for the user's todo changes; replaces polling GET /todos/.
+
+    Each event names the change (created, updated, completed, deleted) and
+    carries the todo, or only its id for deletes. "changed" and "resync" mean
+    several todos changed or events were dropped, and the list should be refetched.
+    "expired" ends the stream when the token expires.
+    """
+    # No database session: an open stream must not hold a pool connection
+    return StreamingResponse(todo_events.stream(current_user.get_uuid(), current_user.expires_at), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @router.get("/{todo_id}", response_model=models.TodoResponse)
-def get_todo(db: DbSession, todo_id: UUID, current_user: CurrentUser):
-    return service.get_todo_by_id(current_user, db, todo_id)
+def get_todo(request: Request, db: ReadDbSession, todo_id: UUID, current_user: CurrentUser):
+    version = service.get_todos_version(current_user, db)
+    etag = make_etag("todo", current_user.user_id, version, todo_id)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+
+    todo = service.get_todo_by_id(current_user, db, todo_id, version=version)
+    return model_response(models.todo_response_adapter, todo,
+                          headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
 
 
 @router.put("/{todo_id}", response_model=models.TodoResponse)
-def update_todo(db: DbSession, todo_id: UUID, todo_update: models.TodoCreate, current_user: CurrentUser):
-    return service.update_todo(current_user, db, todo_id, todo_update)
+def update_todo(db: PrimaryDbSession, todo_id: UUID, todo_update: models.TodoCreate, current_user: CurrentUser):
+    return model_response(models.todo_response_adapter, service.update_todo(current_user, db, todo_id, todo_update))
 
 
 @router.put("/{todo_id}/complete", response_model=models.TodoResponse)
-def complete_todo(db: DbSession, todo_id: UUID, current_user: CurrentUser):
-    return service.complete_todo(current_user, db, todo_id)
+def complete_todo(db: PrimaryDbSession, todo_id: UUID, current_user: CurrentUser):
+    return model_response(models.todo_response_adapter, service.complete_todo(current_user, db, todo_id))
 
 
 @router.delete("/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_todo(db: DbSession, todo_id: UUID, current_user: CurrentUser):
+def delete_todo(db: PrimaryDbSession, todo_id: UUID, current_user: CurrentUser):
     service.delete_todo(current_user, db, todo_id)
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import contextmanager
+from uuid import UUID
+
+from src.entities.todo import Todo
+from src.pubsub import LocalPubSub, pubsub
+from . import models
+
+TODO_EVENTS_CHANNEL = "todo-events"
+TODO_STREAM_QUEUE_SIZE = int(os.getenv('TODO_STREAM_QUEUE_SIZE', '100'))
+# Comment lines keep idle streams open through proxies that time out quiet connections
+TODO_STREAM_KEEPALIVE_SECONDS = float(os.getenv('TODO_STREAM_KEEPALIVE_SECONDS', '15'))
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class TodoSubscription:
+    """One open stream: a bounded queue filled from whichever thread delivers events"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.loop = loop
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(queue_size)
+
+    def deliver(self, message: dict) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # the stream's loop has closed
+
+    def _put(self, message: dict) -> None:
+        if self.queue.full():
+            # The client is not keeping up; drop what is queued and tell it to refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = {"type": models.TodoEventType.resync, "data": {}}
+        self.queue.put_nowait(message)
+
+
+class TodoEventHub:
+    """Publishes todo changes to the broker and fans them out to this worker's streams.
+
+    One broker subscription serves every stream in the worker, so Redis sees
+    one channel however many clients are connected. With LocalPubSub events
+    reach only streams on the worker that made the change.
+    """
+
+    def __init__(self, broker: LocalPubSub, channel: str = TODO_EVENTS_CHANNEL,
+                 queue_size: int = TODO_STREAM_QUEUE_SIZE, keepalive: float = TODO_STREAM_KEEPALIVE_SECONDS):
+        self.broker = broker
+        self.channel = channel
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self._subscriptions: dict[str, set[TodoSubscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        broker.subscribe(channel, self._on_message)
+
+    def reset_after_fork(self) -> None:
+        # Streams belong to the parent's event loop; a forked worker starts with none
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, user_id: UUID, event_type: models.TodoEventType, data: dict) -> None:
+        """Call after the change has committed; failures are logged, never raised"""
+        try:
+            self.broker.publish(self.channel, {"user_id": str(user_id), "type": event_type, "data": data})
+        except Exception as e:
+            logging.error("Failed to publish todo event for user %s. Error: %s", user_id, e)
+
+    def publish_todo(self, user_id: UUID, event_type: models.TodoEventType, todo: Todo) -> None:
+        self.publish(user_id, event_type, models.todo_response_adapter.dump_python(todo, mode="json"))
+
+    def _on_message(self, message: dict) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(message["user_id"], ()))
+        for subscription in subscriptions:
+            subscription.deliver(message)
+
+    @contextmanager
+    def subscribe(self, user_id: UUID):
+        subscription = TodoSubscription(asyncio.get_running_loop(), self.queue_size)
+        key = str(user_id)
+        with self._lock:
+            self._subscriptions[key].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions[key].discard(subscription)
+                if not self._subscriptions[key]:
+                    del self._subscriptions[key]
+
+    async def stream(self, user_id: UUID, expires_at: float | None = None) -> AsyncIterator[str]:
+        """Server-sent events for one user until the client disconnects or its token expires.
+
+        The token is only checked when the stream opens, so its expiry is
+        checked again whenever the stream wakes up; an "expired" event then
+        ends it.
+        """
+        with self.subscribe(user_id) as subscription:
+            # Tell EventSource how long to wait before reconnecting
+            yield "retry: 3000\n\n"
+            while True:
+                timeout = self.keepalive
+                if expires_at is not None:
+                    remaining = expires_at - time.time()
+                    if remaining <= 0:
+                        yield format_sse(models.TodoEventType.expired, {})
+                        return
+                    timeout = min(timeout, remaining)
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    if expires_at is None or time.time() < expires_at:
+                        yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(message["type"], message["data"])
+
+
+todo_events = TodoEventHub(pubsub)
+os.register_at_fork(after_in_child=todo_events.reset_after_fork)
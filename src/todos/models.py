@@ -1,14 +1,33 @@
 from datetime import datetime
+from enum import StrEnum
 from typing import Optional
 from uuid import UUID
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator, model_validator
 from src.entities.todo import Priority
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 500
+
+def coerce_priority(value):
+    # Query strings and CSV files carry priorities as text, accept both "High" and "3"
+    if isinstance(value, str) and value in Priority.__members__:
+        return Priority[value]
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
+
+
 class TodoBase(BaseModel):
     description: str
     due_date: Optional[datetime] = None
     priority: Priority = Priority.Medium
 
+    @field_validator("priority", mode="before")
+    @classmethod
+    def parse_priority(cls, value):
+        return coerce_priority(value)
+
 class TodoCreate(TodoBase):
     pass
 
@@ -18,3 +37,128 @@ class TodoResponse(TodoBase):
     completed_at: Optional[datetime] = None
     
     model_config = ConfigDict(from_attributes=True)
+
+
+# Built once at import; used by the routes to serialize ORM rows straight to JSON
+todo_response_adapter = TypeAdapter(TodoResponse)
+todo_list_adapter = TypeAdapter(list[TodoResponse])
+
+
+class TodoEventType(StrEnum):
+    created = "created"
+    updated = "updated"
+    completed = "completed"
+    deleted = "deleted"
+    # Many todos changed at once (batch, import); refetch the list
+    changed = "changed"
+    # Events were dropped for a slow stream; refetch the list
+    resync = "resync"
+    # The stream's token expired; reconnect with a fresh one
+    expired = "expired"
+
+
+class TodoSortKey(StrEnum):
+    created_at = "created_at"
+    due_date = "due_date"
+    priority = "priority"
+
+
+class SortOrder(StrEnum):
+    asc = "asc"
+    desc = "desc"
+
+
+class TodoFilters(BaseModel):
+    completed: Optional[bool] = None
+    priority: list[Priority] = Field(default_factory=list)
+    due_before: Optional[datetime] = None
+    due_after: Optional[datetime] = None
+    sort: TodoSortKey = TodoSortKey.created_at
+    order: SortOrder = SortOrder.asc
+
+    @field_validator("priority", mode="before")
+    @classmethod
+    def parse_priority(cls, value):
+        values = value if isinstance(value, list) else [value]
+        return [coerce_priority(item) for item in values]
+
+
+class TodoListParams(TodoFilters):
+    limit: int = Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
+
+
+class TodoChangesParams(BaseModel):
+    since: Optional[str] = None
+    limit: int = Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+
+
+class TodoChanges(BaseModel):
+    changed: list[TodoResponse]
+    deleted: list[UUID]
+    # Pass back as ?since= on the next call; has_more means call again right away
+    checkpoint: str
+    has_more: bool
+
+
+todo_changes_adapter = TypeAdapter(TodoChanges)
+
+
+class TodoFileFormat(StrEnum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class TodoBatchOperationType(StrEnum):
+    create = "create"
+    update = "update"
+    complete = "complete"
+    delete = "delete"
+
+
+class TodoBatchOperation(BaseModel):
+    op: TodoBatchOperationType
+    id: Optional[UUID] = None
+    todo: Optional[TodoCreate] = None
+
+    @model_validator(mode="after")
+    def check_fields_for_op(self):
+        if self.op == TodoBatchOperationType.create:
+            if self.todo is None or self.id is not None:
+                raise ValueError("create takes a todo and no id")
+        elif self.id is None:
+            raise ValueError(f"{self.op} requires an id")
+        elif self.op == TodoBatchOperationType.update and self.todo is None:
+            raise ValueError("update requires a todo")
+        return self
+
+
+class TodoBatchRequest(BaseModel):
+    operations: list[TodoBatchOperation] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class TodoBatchItemStatus(StrEnum):
+    ok = "ok"
+    not_found = "not_found"
+
+
+class TodoBatchResult(BaseModel):
+    index: int
+    op: TodoBatchOperationType
+    id: Optional[UUID] = None
+    status: TodoBatchItemStatus
+
+
+class TodoBatchResponse(BaseModel):
+    results: list[TodoBatchResult]
+
+
+class TodoImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class TodoImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: list[TodoImportRowError]
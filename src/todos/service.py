@@ -1,64 +1,553 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections.abc import Iterator
+from typing import BinaryIO
 from datetime import datetime, timezone
 from uuid import uuid4, UUID
+import binascii
+import csv
+import heapq
+import io
+import itertools
+import json
+from sqlalchemy import and_, case, delete, insert, or_, select, tuple_, update
 from sqlalchemy.orm import Session
-from fastapi import HTTPException
+from pydantic import ValidationError
 from . import models
 from src.auth.models import TokenData
-from src.entities.todo import Todo
-from src.exceptions import TodoCreationError, TodoNotFoundError
+from src.entities.todo import Todo, TodoTombstone, Priority
+from src.entities.user import User
+from .cache import todo_cache
+from .events import todo_events
+from src.timing import phase
+from src.exceptions import (TodoCreationError, TodoNotFoundError, InvalidCursorError, InvalidCheckpointError,
+                            TodoBatchError)
 import logging
 
+EXPORT_CHUNK_SIZE = 1000
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_IMPORT_ERRORS = 100
+
+IMPORT_COLUMNS = ("id", "user_id", "description", "due_date", "priority", "is_completed", "created_at", "updated_at")
+
+EXPORT_COLUMNS = (
+    Todo.id, Todo.description, Todo.due_date, Todo.priority,
+    Todo.is_completed, Todo.completed_at, Todo.created_at,
+)
+
+PRIORITY_RANK = case(*[(Todo.priority == priority, priority.value) for priority in Priority])
+
+SORT_COLUMNS = {
+    models.TodoSortKey.created_at: Todo.created_at,
+    models.TodoSortKey.due_date: Todo.due_date,
+    models.TodoSortKey.priority: PRIORITY_RANK,
+}
+
+NULLABLE_SORT_KEYS = {models.TodoSortKey.due_date}
+
+
+def _sort_value(todo: Todo, sort: models.TodoSortKey):
+    if sort == models.TodoSortKey.priority:
+        return todo.priority.value
+    value = getattr(todo, sort.value)
+    return value.isoformat() if value is not None else None
+
+
+def _parse_sort_value(sort: models.TodoSortKey, value):
+    if value is None or sort == models.TodoSortKey.priority:
+        return value
+    return datetime.fromisoformat(value)
+
+
+def encode_cursor(todo: Todo, filters: models.TodoFilters | None = None) -> str:
+    filters = filters or models.TodoFilters()
+    payload = json.dumps([filters.sort.value, filters.order.value,
+                          _sort_value(todo, filters.sort), str(todo.id)])
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, filters: models.TodoFilters | None = None) -> tuple[object, UUID]:
+    filters = filters or models.TodoFilters()
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort, order, value, todo_id = json.loads(urlsafe_b64decode(padded))
+        if sort != filters.sort.value or order != filters.order.value:
+            raise ValueError("cursor was issued for a different sort order")
+        return _parse_sort_value(filters.sort, value), UUID(todo_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        logging.warning("Invalid pagination cursor: %s. Error: %s", cursor, e)
+        raise InvalidCursorError()
+
+
+def get_next_cursor(todos: list[Todo], limit: int | None,
+                    filters: models.TodoFilters | None = None) -> str | None:
+    if limit is None or len(todos) < limit:
+        return None
+    return encode_cursor(todos[-1], filters)
+
+
+def encode_checkpoint(changed_at: datetime | None, todo_id: UUID | None) -> str:
+    payload = json.dumps([changed_at.isoformat() if changed_at else None, str(todo_id) if todo_id else None])
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_checkpoint(checkpoint: str) -> tuple[datetime, UUID] | None:
+    """The (changed_at, id) a sync resumes after, or None for the initial checkpoint"""
+    try:
+        padded = checkpoint + "=" * (-len(checkpoint) % 4)
+        changed_at, todo_id = json.loads(urlsafe_b64decode(padded))
+        if changed_at is None:
+            return None
+        return datetime.fromisoformat(changed_at), UUID(todo_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        logging.warning("Invalid sync checkpoint: %s. Error: %s", checkpoint, e)
+        raise InvalidCheckpointError()
+
+
+def _after_cursor(filters: models.TodoFilters, value, todo_id: UUID):
+    column = SORT_COLUMNS[filters.sort]
+    descending = filters.order == models.SortOrder.desc
+    if filters.sort not in NULLABLE_SORT_KEYS:
+        key = tuple_(column, Todo.id)
+        return key < (value, todo_id) if descending else key > (value, todo_id)
+
+    # Nullable keys sort NULLs last in both directions, so the NULL tail is
+    # only ordered by id and always follows every non-NULL value.
+    after_id = Todo.id < todo_id if descending else Todo.id > todo_id
+    if value is None:
+        return and_(column.is_(None), after_id)
+    after_value = column < value if descending else column > value
+    return or_(after_value, and_(column == value, after_id), column.is_(None))
+
+
+def _apply_filters(query, filters: models.TodoFilters):
+    if filters.completed is not None:
+        query = query.filter(Todo.is_completed == filters.completed)
+    if filters.priority:
+        query = query.filter(Todo.priority.in_(filters.priority))
+    if filters.due_before is not None:
+        query = query.filter(Todo.due_date < filters.due_before)
+    if filters.due_after is not None:
+        query = query.filter(Todo.due_date > filters.due_after)
+    return query
+
+
+def _apply_ordering(query, filters: models.TodoFilters):
+    column = SORT_COLUMNS[filters.sort]
+    if filters.order == models.SortOrder.desc:
+        ordering = [column.desc(), Todo.id.desc()]
+    else:
+        ordering = [column.asc(), Todo.id.asc()]
+    if filters.sort in NULLABLE_SORT_KEYS:
+        ordering[0] = ordering[0].nulls_last()
+    return query.order_by(*ordering)
+
+
+def bump_todos_version(db: Session, user_id: UUID) -> datetime:
+    """Record a change to the user's todos and return the time to stamp it with.
+
+    Call first in the writing transaction: the UPDATE locks the user's row
+    until commit, so one user's writes are serialized and their updated_at
+    and deleted_at stamps increase in commit order, which GET /todos/changes
+    relies on to never skip a change. Stamps come from the app clock, so
+    hosts serving one database need synchronized clocks.
+    """
+    db.execute(update(User).where(User.id == user_id).values(todos_version=User.todos_version + 1))
+    return datetime.now(timezone.utc)
+
+
+def get_todos_version(current_user: TokenData, db: Session) -> int:
+    version = db.scalar(select(User.todos_version).where(User.id == current_user.get_uuid()))
+    return version or 0
+
+
 def create_todo(current_user: TokenData, db: Session, todo: models.TodoCreate) -> Todo:
     try:
-        new_todo = Todo(**todo.model_dump())
-        new_todo.user_id = current_user.get_uuid()
-        db.add(new_todo)
+        now = bump_todos_version(db, current_user.get_uuid())
+        statement = (
+            insert(Todo)
+            .values(**todo.model_dump(), user_id=current_user.get_uuid(), updated_at=now)
+            .returning(Todo)
+        )
+        new_todo = db.scalars(statement).one()
         db.commit()
-        db.refresh(new_todo)
-        logging.info(f"Created new todo for user: {current_user.get_uuid()}")
+        todo_events.publish_todo(new_todo.user_id, models.TodoEventType.created, new_todo)
+        logging.info("Created new todo for user: %s", current_user.get_uuid())
         return new_todo
     except Exception as e:
-        logging.error(f"Failed to create todo for user {current_user.get_uuid()}. Error: {str(e)}")
+        logging.error("Failed to create todo for user %s. Error: %s", current_user.get_uuid(), e)
         raise TodoCreationError(str(e))
 
 
-def get_todos(current_user: TokenData, db: Session) -> list[models.TodoResponse]:
-    todos = db.query(Todo).filter(Todo.user_id == current_user.get_uuid()).all()
-    logging.info(f"Retrieved {len(todos)} todos for user: {current_user.get_uuid()}")
+def get_todos(current_user: TokenData, db: Session, filters: models.TodoFilters | None = None,
+              limit: int | None = None, cursor: str | None = None,
+              version: int | None = None) -> list[models.TodoResponse]:
+    """Pass the version read for the ETag so the cached body matches it; otherwise it is read here"""
+    filters = filters or models.TodoFilters()
+    if version is None:
+        version = get_todos_version(current_user, db)
+    cache_key = todo_cache.list_key(current_user.get_uuid(), version, filters, limit, cursor)
+    cached = todo_cache.get_list(cache_key)
+    if cached is not None:
+        logging.info("Retrieved %s cached todos for user: %s", len(cached), current_user.get_uuid())
+        return cached
+
+    query = _apply_filters(db.query(Todo).filter(Todo.user_id == current_user.get_uuid()), filters)
+    if cursor:
+        value, todo_id = decode_cursor(cursor, filters)
+        query = query.filter(_after_cursor(filters, value, todo_id))
+    query = _apply_ordering(query, filters)
+    if limit is not None:
+        query = query.limit(limit)
+    with phase("orm"):
+        todos = query.all()
+    todo_cache.set_list(cache_key, todos)
+    logging.info("Retrieved %s todos for user: %s", len(todos), current_user.get_uuid())
     return todos
 
 
-def get_todo_by_id(current_user: TokenData, db: Session, todo_id: UUID) -> Todo:
-    todo = db.query(Todo).filter(Todo.id == todo_id).filter(Todo.user_id == current_user.get_uuid()).first()
+def _get_owned_todo(current_user: TokenData, db: Session, todo_id: UUID) -> Todo:
+    with phase("orm"):
+        todo = db.query(Todo).filter(Todo.id == todo_id).filter(Todo.user_id == current_user.get_uuid()).first()
     if not todo:
-        logging.warning(f"Todo {todo_id} not found for user {current_user.get_uuid()}")
+        logging.warning("Todo %s not found for user %s", todo_id, current_user.get_uuid())
         raise TodoNotFoundError(todo_id)
-    logging.info(f"Retrieved todo {todo_id} for user {current_user.get_uuid()}")
     return todo
 
 
+def get_todo_by_id(current_user: TokenData, db: Session, todo_id: UUID, version: int | None = None) -> Todo:
+    if version is None:
+        version = get_todos_version(current_user, db)
+    cache_key = todo_cache.item_key(current_user.get_uuid(), version, todo_id)
+    todo = todo_cache.get_item(cache_key)
+    if todo is None:
+        todo = _get_owned_todo(current_user, db, todo_id)
+        todo_cache.set_item(cache_key, todo)
+    logging.info("Retrieved todo %s for user %s", todo_id, current_user.get_uuid())
+    return todo
+
+
+def get_todo_changes(current_user: TokenData, db: Session, since: str | None = None,
+                     limit: int = models.DEFAULT_PAGE_SIZE) -> models.TodoChanges:
+    """Todos changed and deleted after the checkpoint, oldest change first.
+
+    Both queries walk a (user_id, changed_at, id) index from the checkpoint,
+    so a client that is in sync pays for its changes, not its list. Without
+    a checkpoint every todo is returned and tombstones are skipped, since the
+    client has nothing to delete.
+    """
+    user_id = current_user.get_uuid()
+    after = decode_checkpoint(since) if since else None
+
+    todo_query = select(Todo).where(Todo.user_id == user_id)
+    if after:
+        todo_query = todo_query.where(tuple_(Todo.updated_at, Todo.id) > after)
+    with phase("orm"):
+        # Rows already in the session may hold values from before a bulk write
+        todos = db.scalars(todo_query.order_by(Todo.updated_at, Todo.id).limit(limit + 1),
+                           execution_options={"populate_existing": True}).all()
+        tombstones = []
+        if after:
+            tombstones = db.execute(
+                select(TodoTombstone.deleted_at, TodoTombstone.id)
+                .where(TodoTombstone.user_id == user_id)
+                .where(tuple_(TodoTombstone.deleted_at, TodoTombstone.id) > after)
+                .order_by(TodoTombstone.deleted_at, TodoTombstone.id)
+                .limit(limit + 1)
+            ).all()
+
+    changes = heapq.merge(((todo.updated_at, todo.id, todo) for todo in todos),
+                          ((row.deleted_at, row.id, None) for row in tombstones),
+                          key=lambda change: change[:2])
+    page = list(itertools.islice(changes, limit + 1))
+    has_more = len(page) > limit
+    page = page[:limit]
+    if page:
+        checkpoint = encode_checkpoint(*page[-1][:2])
+    else:
+        checkpoint = since or encode_checkpoint(None, None)
+    logging.info("Retrieved %s todo changes for user: %s", len(page), user_id)
+    return models.TodoChanges(
+        changed=[models.TodoResponse.model_validate(todo) for _, _, todo in page if todo is not None],
+        deleted=[todo_id for _, todo_id, todo in page if todo is None],
+        checkpoint=checkpoint,
+        has_more=has_more,
+    )
+
+
+def _owned(current_user: TokenData, todo_id: UUID):
+    return and_(Todo.id == todo_id, Todo.user_id == current_user.get_uuid())
+
+
 def update_todo(current_user: TokenData, db: Session, todo_id: UUID, todo_update: models.TodoCreate) -> Todo:
     todo_data = todo_update.model_dump(exclude_unset=True)
-    db.query(Todo).filter(Todo.id == todo_id).filter(Todo.user_id == current_user.get_uuid()).update(todo_data)
+    now = bump_todos_version(db, current_user.get_uuid())
+    statement = update(Todo).where(_owned(current_user, todo_id)).values(**todo_data, updated_at=now).returning(Todo)
+    todo = db.scalars(statement, execution_options={"populate_existing": True}).one_or_none()
+    if todo is None:
+        db.rollback()
+        logging.warning("Todo %s not found for user %s", todo_id, current_user.get_uuid())
+        raise TodoNotFoundError(todo_id)
     db.commit()
-    logging.info(f"Successfully updated todo {todo_id} for user {current_user.get_uuid()}")
-    return get_todo_by_id(current_user, db, todo_id)
+    todo_events.publish_todo(current_user.get_uuid(), models.TodoEventType.updated, todo)
+    logging.info("Successfully updated todo %s for user %s", todo_id, current_user.get_uuid())
+    return todo
+
 
 def complete_todo(current_user: TokenData, db: Session, todo_id: UUID) -> Todo:
-    todo = get_todo_by_id(current_user, db, todo_id)
-    if todo.is_completed:
-        logging.debug(f"Todo {todo_id} is already completed")
+    now = bump_todos_version(db, current_user.get_uuid())
+    statement = (
+        update(Todo)
+        .where(_owned(current_user, todo_id), Todo.is_completed.is_(False))
+        .values(is_completed=True, completed_at=now, updated_at=now)
+        .returning(Todo)
+    )
+    todo = db.scalars(statement, execution_options={"populate_existing": True}).one_or_none()
+    if todo is None:
+        # Either missing or already completed; only then is a SELECT needed
+        db.rollback()
+        todo = _get_owned_todo(current_user, db, todo_id)
+        logging.debug("Todo %s is already completed", todo_id)
         return todo
-    todo.is_completed = True
-    todo.completed_at = datetime.now(timezone.utc)
     db.commit()
-    db.refresh(todo)
-    logging.info(f"Todo {todo_id} marked as completed by user {current_user.get_uuid()}")
+    todo_events.publish_todo(current_user.get_uuid(), models.TodoEventType.completed, todo)
+    logging.info("Todo %s marked as completed by user %s", todo_id, current_user.get_uuid())
     return todo
 
 
 def delete_todo(current_user: TokenData, db: Session, todo_id: UUID) -> None:
-    todo = get_todo_by_id(current_user, db, todo_id)
-    db.delete(todo)
+    now = bump_todos_version(db, current_user.get_uuid())
+    deleted = db.scalar(delete(Todo).where(_owned(current_user, todo_id)).returning(Todo.id))
+    if deleted is None:
+        db.rollback()
+        logging.warning("Todo %s not found for user %s", todo_id, current_user.get_uuid())
+        raise TodoNotFoundError(todo_id)
+    db.execute(insert(TodoTombstone).values(id=deleted, user_id=current_user.get_uuid(), deleted_at=now))
     db.commit()
-    logging.info(f"Todo {todo_id} deleted by user {current_user.get_uuid()}")
+    todo_events.publish(current_user.get_uuid(), models.TodoEventType.deleted, {"id": str(todo_id)})
+    logging.info("Todo %s deleted by user %s", todo_id, current_user.get_uuid())
+
+
+def apply_todo_batch(current_user: TokenData, db: Session,
+                     batch: models.TodoBatchRequest) -> models.TodoBatchResponse:
+    """Apply many operations in one transaction with one bulk statement per kind.
+
+    Operations run grouped by kind: creates, then updates, then completes,
+    then deletes. Operations on todos the user does not own report not_found.
+    """
+    user_id = current_user.get_uuid()
+    operations = batch.operations
+    referenced_ids = {operation.id for operation in operations if operation.id is not None}
+    owned_ids = set()
+    if referenced_ids:
+        owned_ids = set(db.scalars(
+            select(Todo.id).where(Todo.user_id == user_id).where(Todo.id.in_(referenced_ids))))
+
+    results = []
+    creates, updates, completes, deletes = [], [], [], []
+    for index, operation in enumerate(operations):
+        todo_id = operation.id
+        status = models.TodoBatchItemStatus.ok
+        if operation.op == models.TodoBatchOperationType.create:
+            todo_id = uuid4()
+            creates.append({**operation.todo.model_dump(), "id": todo_id, "user_id": user_id})
+        elif todo_id not in owned_ids:
+            status = models.TodoBatchItemStatus.not_found
+        elif operation.op == models.TodoBatchOperationType.update:
+            updates.append({**operation.todo.model_dump(exclude_unset=True), "id": todo_id})
+        elif operation.op == models.TodoBatchOperationType.complete:
+            completes.append(todo_id)
+        else:
+            deletes.append(todo_id)
+        results.append(models.TodoBatchResult(index=index, op=operation.op, id=todo_id, status=status))
+
+    try:
+        if creates or updates or completes or deletes:
+            now = bump_todos_version(db, user_id)
+        if creates:
+            db.execute(insert(Todo), [{**values, "updated_at": now} for values in creates])
+        if updates:
+            db.execute(update(Todo), [{**values, "updated_at": now} for values in updates])
+        if completes:
+            db.execute(
+                update(Todo)
+                .where(Todo.user_id == user_id)
+                .where(Todo.id.in_(completes))
+                .where(Todo.is_completed.is_(False))
+                .values(is_completed=True, completed_at=now, updated_at=now)
+            )
+        if deletes:
+            db.execute(delete(Todo).where(Todo.user_id == user_id).where(Todo.id.in_(deletes)))
+            db.execute(insert(TodoTombstone), [{"id": todo_id, "user_id": user_id, "deleted_at": now}
+                                                for todo_id in dict.fromkeys(deletes)])
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logging.error("Failed to apply todo batch for user %s. Error: %s", user_id, e)
+        raise TodoBatchError(str(e))
+    if creates or updates or completes or deletes:
+        todo_events.publish(user_id, models.TodoEventType.changed, {})
+    logging.info("Applied batch of %s todo operations for user %s", len(operations), user_id)
+    return models.TodoBatchResponse(results=results)
+
+
+def iter_todo_rows(current_user: TokenData, db: Session, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator:
+    """Yield lists of plain column rows from a server-side cursor, chunk_size rows at a time"""
+    statement = (
+        select(*EXPORT_COLUMNS)
+        .where(Todo.user_id == current_user.get_uuid())
+        .order_by(Todo.created_at, Todo.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    for partition in db.execute(statement).partitions():
+        yield partition
+
+
+def _export_record(row) -> dict:
+    return {
+        "id": str(row.id),
+        "description": row.description,
+        "due_date": row.due_date.isoformat() if row.due_date else None,
+        "priority": row.priority.value,
+        "is_completed": row.is_completed,
+        "completed_at": row.completed_at.isoformat() if row.completed_at else None,
+        "created_at": row.created_at.isoformat(),
+    }
+
+
+def export_todos(current_user: TokenData, db: Session, export_format: models.TodoFileFormat,
+                 chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    exported = 0
+    if export_format == models.TodoFileFormat.csv:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=[column.key for column in EXPORT_COLUMNS])
+        writer.writeheader()
+        for partition in iter_todo_rows(current_user, db, chunk_size):
+            writer.writerows(_export_record(row) for row in partition)
+            exported += len(partition)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    else:
+        for partition in iter_todo_rows(current_user, db, chunk_size):
+            lines = [json.dumps(_export_record(row), ensure_ascii=False) for row in partition]
+            exported += len(partition)
+            yield ("\n".join(lines) + "\n").encode()
+    logging.info("Exported %s todos as %s for user %s", exported, export_format, current_user.get_uuid())
+
+
+def _iter_import_records(stream: BinaryIO, file_format: models.TodoFileFormat) -> Iterator[tuple[int, dict | str]]:
+    """Yield (line number, record) pairs, or (line number, error) for unparseable lines"""
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    try:
+        if file_format == models.TodoFileFormat.csv:
+            reader = csv.DictReader(text)
+            for record in reader:
+                yield reader.line_num, {key: value for key, value in record.items() if value != ""}
+        else:
+            for line_number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_number, f"Invalid JSON: {str(e)}"
+                    continue
+                yield line_number, record if isinstance(record, dict) else "Expected a JSON object"
+    except UnicodeDecodeError as e:
+        yield -1, f"File is not valid UTF-8: {str(e)}"
+    finally:
+        text.detach()
+
+
+def _copy_value(value) -> str:
+    # COPY's CSV format reads an unquoted empty field as NULL and a quoted one as ''
+    if value is None:
+        return ""
+    if isinstance(value, Priority):
+        value = value.name
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_buffer(rows: list[dict]) -> io.StringIO:
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_copy_value(row[column]) for column in IMPORT_COLUMNS) + "\n")
+    buffer.seek(0)
+    return buffer
+
+
+def _bulk_insert(db: Session, rows: list[dict]) -> None:
+    if db.get_bind().dialect.name == "postgresql":
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY todos ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                _copy_buffer(rows))
+        finally:
+            cursor.close()
+    else:
+        db.execute(insert(Todo), rows)
+
+
+def import_todos(current_user: TokenData, db: Session, stream: BinaryIO, file_format: models.TodoFileFormat,
+                 chunk_size: int = IMPORT_CHUNK_SIZE) -> models.TodoImportResult:
+    """Validate and insert todos chunk by chunk, committing after each chunk.
+
+    Rows that fail validation are reported and skipped; a chunk the database
+    rejects is rolled back and reported without stopping the import.
+    """
+    user_id = current_user.get_uuid()
+    imported = 0
+    failed = 0
+    errors: list[models.TodoImportRowError] = []
+
+    def record_error(line: int, error: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_IMPORT_ERRORS:
+            errors.append(models.TodoImportRowError(line=line, error=error))
+
+    def flush(rows: list[dict], lines: list[int]) -> None:
+        nonlocal imported
+        try:
+            now = bump_todos_version(db, user_id)
+            for row in rows:
+                row["updated_at"] = now
+            _bulk_insert(db, rows)
+            db.commit()
+            imported += len(rows)
+        except Exception as e:
+            db.rollback()
+            logging.error("Failed to import chunk of %s todos for user %s. Error: %s", len(rows), user_id, e)
+            for line in lines:
+                record_error(line, f"Database error: {str(e)}")
+
+    rows, lines = [], []
+    for line, record in _iter_import_records(stream, file_format):
+        if isinstance(record, str):
+            record_error(line, record)
+            continue
+        try:
+            todo = models.TodoCreate.model_validate(record)
+        except ValidationError as e:
+            record_error(line, "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()))
+            continue
+        rows.append({**todo.model_dump(), "id": uuid4(), "user_id": user_id,
+                     "is_completed": False, "created_at": datetime.now(timezone.utc)})
+        lines.append(line)
+        if len(rows) >= chunk_size:
+            flush(rows, lines)
+            rows, lines = [], []
+    if rows:
+        flush(rows, lines)
+    if imported:
+        # One event for the whole file; per-chunk events would flood open streams
+        todo_events.publish(user_id, models.TodoEventType.changed, {})
+
+    logging.info("Imported %s todos for user %s, %s rows failed", imported, user_id, failed)
+    return models.TodoImportResult(imported=imported, failed=failed, errors=errors)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, TypeAdapter
 from uuid import UUID
 from datetime import datetime
 
@@ -10,6 +10,9 @@ class UserResponse(BaseModel):
     last_name: str
 
 
+user_response_adapter = TypeAdapter(UserResponse)
+
+
 class PasswordChange(BaseModel):
     current_password: str
     new_password: str
@@ -5,15 +5,16 @@ from . import models
 from src.entities.user import User
 from src.exceptions import UserNotFoundError, InvalidPasswordError, PasswordMismatchError
 from src.auth.service import verify_password, get_password_hash
+from src.auth.hashing import password_pool
 import logging
 
 
 def get_user_by_id(db: Session, user_id: UUID) -> models.UserResponse:
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
-        logging.warning(f"User not found with ID: {user_id}")
+        logging.warning("User not found with ID: %s", user_id)
         raise UserNotFoundError(user_id)
-    logging.info(f"Successfully retrieved user with ID: {user_id}")
+    logging.info("Successfully retrieved user with ID: %s", user_id)
     return user
 
 
@@ -22,19 +23,19 @@ def change_password(db: Session, user_id: UUID, password_change: models.Password
         user = get_user_by_id(db, user_id)
         
         # Verify current password
-        if not verify_password(password_change.current_password, user.password_hash):
-            logging.warning(f"Invalid current password provided for user ID: {user_id}")
+        if not password_pool.run(verify_password, password_change.current_password, user.password_hash):
+            logging.warning("Invalid current password provided for user ID: %s", user_id)
             raise InvalidPasswordError()
         
         # Verify new passwords match
         if password_change.new_password != password_change.new_password_confirm:
-            logging.warning(f"Password mismatch during change attempt for user ID: {user_id}")
+            logging.warning("Password mismatch during change attempt for user ID: %s", user_id)
             raise PasswordMismatchError()
         
         # Update password
-        user.password_hash = get_password_hash(password_change.new_password)
+        user.password_hash = password_pool.run(get_password_hash, password_change.new_password)
         db.commit()
-        logging.info(f"Successfully changed password for user ID: {user_id}")
+        logging.info("Successfully changed password for user ID: %s", user_id)
     except Exception as e:
-        logging.error(f"Error during password change for user ID: {user_id}. Error: {str(e)}")
+        logging.error("Error during password change for user ID: %s. Error: %s", user_id, e)
         raise
@@ -1,15 +1,33 @@
+import asyncio
+import os
 import pytest
 import warnings
 from datetime import datetime, timezone
 from uuid import uuid4
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+# Warm-up hashes a password at full cost on every TestClient start; tests/test_startup.py covers it
+os.environ.setdefault("STARTUP_WARMUP", "false")
+os.environ.setdefault("INTERNAL_ENDPOINTS_ENABLED", "true")
+os.environ.setdefault("INTERNAL_API_TOKEN", "test-internal-token")
 from src.database.core import Base
 from src.entities.user import User
 from src.entities.todo import Todo
 from src.auth.models import TokenData
 from src.auth.service import get_password_hash
-from src.rate_limiter import limiter
+from src.rate_limiter import limiter, login_limiter
+from src.cache import MemoryCache
+from src.todos.cache import todo_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_todo_cache():
+    # Every test starts cold; the test database is recreated per test
+    todo_cache.cache = MemoryCache()
+    yield
 
 
 @pytest.fixture(scope="function")
@@ -20,7 +38,7 @@ def db_session():
         SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
     )
     TestingSessionLocal = sessionmaker(
-        autocommit=False, autoflush=False, bind=engine)
+        autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
     Base.metadata.create_all(bind=engine)
     db = TestingSessionLocal()
@@ -31,6 +49,37 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(scope="function")
+def replica(monkeypatch):
+    """Route reads to a second sqlite file that replication never reaches"""
+    from src.database import replicas
+
+    engine = create_engine("sqlite:///./test_replica.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    router = replicas.ReplicaRouter(
+        [sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)], MemoryCache(), window=5)
+    monkeypatch.setattr(replicas, "replica_router", router)
+    try:
+        yield router
+    finally:
+        engine.dispose()
+        os.remove("./test_replica.db")
+
+
+@pytest.fixture(scope="function")
+def async_session_factory(db_session):
+    # Shares the sqlite file created by db_session; NullPool keeps aiosqlite
+    # connections from outliving the event loop that opened them
+    engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+    return async_sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@pytest.fixture(scope="function")
+async def async_db_session(async_session_factory):
+    async with async_session_factory() as db:
+        yield db
+
+
 @pytest.fixture(scope="function")
 def test_user():
     # Create a user with a known password hash
@@ -61,12 +110,13 @@ def test_todo(test_token_data):
 
 
 @pytest.fixture(scope="function")
-def client(db_session):
+def client(db_session, async_session_factory):
     from src.main import app
-    from src.database.core import get_db
+    from src.database.core import get_db, get_async_db
 
     # Disable rate limiting for tests
     limiter.reset()
+    asyncio.run(login_limiter.reset())
 
     def override_get_db():
         try:
@@ -74,7 +124,12 @@ def client(db_session):
         finally:
             db_session.close()
 
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
 
     from fastapi.testclient import TestClient
     with TestClient(app) as test_client:
@@ -82,6 +137,11 @@ def client(db_session):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(scope="function")
+def internal_headers():
+    return {"Authorization": f"Bearer {os.environ['INTERNAL_API_TOKEN']}"}
+
+
 @pytest.fixture(scope="function")
 def auth_headers(client, db_session):
     # Register a test user
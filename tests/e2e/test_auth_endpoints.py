@@ -62,4 +62,47 @@ def test_rate_limiting(client: TestClient):
                 "last_name": "User"
             }
         )
-    assert response.status_code == 429  # Too Many Requests 
\ No newline at end of file
+    assert response.status_code == 429  # Too Many Requests 
+
+def test_login_rate_limiting(client: TestClient, internal_headers, monkeypatch):
+    from limits import parse
+    from src.rate_limiter import login_limiter
+    monkeypatch.setitem(login_limiter.limits, "account", parse("2/minute"))
+
+    form = {"username": "nobody@example.com", "password": "wrong", "grant_type": "password"}
+    assert client.post("/auth/token", data=form).status_code == 401
+    assert client.post("/auth/token", data=form).status_code == 401
+    response = client.post("/auth/token", data=form)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    metrics = client.get("/metrics", headers=internal_headers).text
+    assert 'rate_limit_decisions_total{limit="login_account",result="rejected"}' in metrics
+
+
+def metric_value(metrics: str, sample: str) -> float:
+    for line in metrics.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.split()[-1])
+    raise AssertionError(f"{sample} not exported")
+
+
+def test_token_cache_lookups_are_exported(client: TestClient, auth_headers, internal_headers):
+    from src.auth.token_cache import token_cache
+    token_cache.clear()
+    before = client.get("/metrics", headers=internal_headers).text
+
+    assert client.get("/users/me", headers=auth_headers).status_code == 200
+    assert client.get("/users/me", headers=auth_headers).status_code == 200
+
+    after = client.get("/metrics", headers=internal_headers).text
+    for result in ("hit", "miss"):
+        sample = f'token_cache_lookups_total{{result="{result}"}}'
+        assert metric_value(after, sample) == metric_value(before, sample) + 1
+
+
+def test_password_hash_pool_is_exported(client: TestClient, auth_headers, internal_headers):
+    metrics = client.get("/metrics", headers=internal_headers).text
+    assert metric_value(metrics, "password_hash_wait_seconds_count") >= 2  # register and login
+    assert 'password_hash_wait_seconds_bucket{le="+Inf"}' in metrics
+    assert metric_value(metrics, "password_hash_rejected_total") >= 0
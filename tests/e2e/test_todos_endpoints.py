@@ -1,6 +1,24 @@
+import json
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from uuid import uuid4
 
+
+@contextmanager
+def count_statements(db_session):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
 def test_todo_crud_operations(client: TestClient, auth_headers):
     # Create todo
     create_response = client.post(
@@ -92,4 +110,254 @@ def test_todo_not_found(client: TestClient, auth_headers):
     assert response.status_code == 404
 
     response = client.delete(f"/todos/{non_existent_id}", headers=auth_headers)
-    assert response.status_code == 404 
\ No newline at end of file
+    assert response.status_code == 404 
+
+def test_todo_list_pagination(client: TestClient, auth_headers):
+    created_ids = set()
+    for i in range(3):
+        response = client.post("/todos/", headers=auth_headers, json={"description": f"Todo {i}"})
+        created_ids.add(response.json()["id"])
+
+    first_page = client.get("/todos/", headers=auth_headers, params={"limit": 2})
+    assert first_page.status_code == 200
+    assert len(first_page.json()) == 2
+    cursor = first_page.headers["X-Next-Cursor"]
+
+    second_page = client.get("/todos/", headers=auth_headers, params={"limit": 2, "cursor": cursor})
+    assert second_page.status_code == 200
+    assert len(second_page.json()) == 1
+    assert "X-Next-Cursor" not in second_page.headers
+
+    listed_ids = {todo["id"] for todo in first_page.json() + second_page.json()}
+    assert listed_ids == created_ids
+
+    response = client.get("/todos/", headers=auth_headers, params={"cursor": "garbage"})
+    assert response.status_code == 400
+
+    response = client.get("/todos/", headers=auth_headers, params={"limit": 0})
+    assert response.status_code == 422
+
+
+def test_todo_list_filtering(client: TestClient, auth_headers):
+    client.post("/todos/", headers=auth_headers, json={"description": "Urgent", "priority": 4})
+    client.post("/todos/", headers=auth_headers, json={"description": "Someday", "priority": 1})
+    done = client.post("/todos/", headers=auth_headers, json={"description": "Done", "priority": 4})
+    client.put(f"/todos/{done.json()['id']}/complete", headers=auth_headers)
+
+    response = client.get(
+        "/todos/",
+        headers=auth_headers,
+        params={"completed": "false", "priority": ["High", "4"], "sort": "priority", "order": "desc"}
+    )
+    assert response.status_code == 200
+    assert [todo["description"] for todo in response.json()] == ["Urgent"]
+
+    response = client.get("/todos/", headers=auth_headers, params={"sort": "title"})
+    assert response.status_code == 422
+
+
+def test_todo_batch_operations(client: TestClient, auth_headers):
+    todo_id = client.post("/todos/", headers=auth_headers, json={"description": "Synced"}).json()["id"]
+
+    response = client.post(
+        "/todos/batch",
+        headers=auth_headers,
+        json={"operations": [
+            {"op": "create", "todo": {"description": "Offline 1"}},
+            {"op": "create", "todo": {"description": "Offline 2", "priority": 4}},
+            {"op": "complete", "id": todo_id},
+            {"op": "delete", "id": str(uuid4())},
+        ]}
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["ok", "ok", "ok", "not_found"]
+
+    todos = client.get("/todos/", headers=auth_headers).json()
+    assert len(todos) == 3
+    assert next(todo for todo in todos if todo["id"] == todo_id)["is_completed"]
+
+    response = client.post("/todos/batch", headers=auth_headers, json={"operations": [{"op": "complete"}]})
+    assert response.status_code == 422
+
+    response = client.post("/todos/batch", json={"operations": [{"op": "delete", "id": todo_id}]})
+    assert response.status_code == 401
+
+
+def test_todo_export(client: TestClient, auth_headers):
+    for i in range(3):
+        client.post("/todos/", headers=auth_headers, json={"description": f"Export {i}"})
+
+    response = client.get("/todos/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert [json.loads(line)["description"] for line in lines] == ["Export 0", "Export 1", "Export 2"]
+
+    response = client.get("/todos/export", headers=auth_headers, params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert len(response.text.splitlines()) == 4
+
+    assert client.get("/todos/export").status_code == 401
+
+
+def test_todo_stream_requires_authentication(client: TestClient):
+    # The open stream itself is covered in the service tests; TestClient buffers whole bodies
+    assert client.get("/todos/stream").status_code == 401
+
+
+def test_todo_import(client: TestClient, auth_headers):
+    csv_upload = "description,priority,due_date\nImported A,High,\nImported B,1,2030-01-01T00:00:00\n,2,\n"
+    response = client.post(
+        "/todos/import",
+        headers=auth_headers,
+        files={"file": ("todos.csv", csv_upload, "text/csv")}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 2
+    assert result["failed"] == 1
+    assert result["errors"][0]["line"] == 4
+
+    ndjson_upload = '{"description": "Imported C"}\n'
+    response = client.post(
+        "/todos/import",
+        headers=auth_headers,
+        files={"file": ("todos.ndjson", ndjson_upload, "application/x-ndjson")}
+    )
+    assert response.json()["imported"] == 1
+
+    todos = client.get("/todos/", headers=auth_headers).json()
+    assert sorted(todo["description"] for todo in todos) == ["Imported A", "Imported B", "Imported C"]
+
+
+def test_todo_conditional_get(client: TestClient, auth_headers):
+    todo_id = client.post("/todos/", headers=auth_headers, json={"description": "Polled"}).json()["id"]
+
+    for path in ("/todos/", f"/todos/{todo_id}"):
+        response = client.get(path, headers=auth_headers)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+
+        response = client.get(path, headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+        response = client.get(path, headers={**auth_headers, "If-None-Match": f'"other", W/{etag}'})
+        assert response.status_code == 304
+
+    list_etag = client.get("/todos/", headers=auth_headers).headers["ETag"]
+    item_etag = client.get(f"/todos/{todo_id}", headers=auth_headers).headers["ETag"]
+    assert client.get("/todos/", headers=auth_headers, params={"limit": 5}).headers["ETag"] != list_etag
+
+    client.put(f"/todos/{todo_id}/complete", headers=auth_headers)
+
+    response = client.get("/todos/", headers={**auth_headers, "If-None-Match": list_etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != list_etag
+    response = client.get(f"/todos/{todo_id}", headers={**auth_headers, "If-None-Match": item_etag})
+    assert response.status_code == 200
+    assert response.json()["is_completed"]
+
+
+def test_todo_reads_reflect_writes(client: TestClient, auth_headers):
+    todo_id = client.post("/todos/", headers=auth_headers, json={"description": "Before"}).json()["id"]
+    assert [t["description"] for t in client.get("/todos/", headers=auth_headers).json()] == ["Before"]
+    assert client.get(f"/todos/{todo_id}", headers=auth_headers).json()["description"] == "Before"
+
+    client.put(f"/todos/{todo_id}", headers=auth_headers, json={"description": "After"})
+    assert [t["description"] for t in client.get("/todos/", headers=auth_headers).json()] == ["After"]
+    assert client.get(f"/todos/{todo_id}", headers=auth_headers).json()["description"] == "After"
+
+    client.delete(f"/todos/{todo_id}", headers=auth_headers)
+    assert client.get("/todos/", headers=auth_headers).json() == []
+    assert client.get(f"/todos/{todo_id}", headers=auth_headers).status_code == 404
+
+
+def test_todo_writes_are_single_round_trip(client: TestClient, auth_headers, db_session):
+    # The users.todos_version bump, which takes the user's row lock, then one RETURNING statement for the todo
+    with count_statements(db_session) as statements:
+        todo_id = client.post("/todos/", headers=auth_headers, json={"description": "Counted"}).json()["id"]
+    assert len(statements) == 2
+    assert statements[0].startswith("UPDATE users")
+    assert statements[1].startswith("INSERT INTO todos") and "RETURNING" in statements[1]
+
+    with count_statements(db_session) as statements:
+        response = client.put(f"/todos/{todo_id}", headers=auth_headers, json={"description": "Recounted"})
+    assert response.json()["description"] == "Recounted"
+    assert len(statements) == 2
+
+    with count_statements(db_session) as statements:
+        response = client.put(f"/todos/{todo_id}/complete", headers=auth_headers)
+    assert response.json()["is_completed"]
+    assert len(statements) == 2
+
+    # Plus the tombstone for GET /todos/changes
+    with count_statements(db_session) as statements:
+        assert client.delete(f"/todos/{todo_id}", headers=auth_headers).status_code == 204
+    assert len(statements) == 3
+    assert statements[2].startswith("INSERT INTO todo_tombstones")
+
+    # Misses take the lock too and roll it back
+    with count_statements(db_session) as statements:
+        assert client.delete(f"/todos/{todo_id}", headers=auth_headers).status_code == 404
+        assert client.put(f"/todos/{todo_id}", headers=auth_headers, json={"description": "Gone"}).status_code == 404
+    assert len(statements) == 4
+
+
+def test_todo_changes_sync(client: TestClient, auth_headers, db_session):
+    first = client.post("/todos/", headers=auth_headers, json={"description": "First"}).json()
+    second = client.post("/todos/", headers=auth_headers, json={"description": "Second"}).json()
+
+    response = client.get("/todos/changes", headers=auth_headers)
+    assert response.status_code == 200
+    initial = response.json()
+    assert [todo["id"] for todo in initial["changed"]] == [first["id"], second["id"]]
+    assert initial["deleted"] == [] and not initial["has_more"]
+
+    # In sync: a 304 from the version check, and an empty delta otherwise
+    response = client.get("/todos/changes", headers={**auth_headers, "If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+    with count_statements(db_session) as statements:
+        in_sync = client.get("/todos/changes", headers=auth_headers,
+                             params={"since": initial["checkpoint"]}).json()
+    assert in_sync == {"changed": [], "deleted": [], "checkpoint": initial["checkpoint"], "has_more": False}
+    assert len(statements) == 3
+
+    client.put(f"/todos/{first['id']}/complete", headers=auth_headers)
+    client.delete(f"/todos/{second['id']}", headers=auth_headers)
+    third = client.post("/todos/", headers=auth_headers, json={"description": "Third"}).json()
+
+    delta = client.get("/todos/changes", headers=auth_headers, params={"since": initial["checkpoint"], "limit": 2}).json()
+    assert [todo["id"] for todo in delta["changed"]] == [first["id"]]
+    assert delta["changed"][0]["is_completed"]
+    assert delta["deleted"] == [second["id"]]
+    assert delta["has_more"]
+
+    rest = client.get("/todos/changes", headers=auth_headers, params={"since": delta["checkpoint"]}).json()
+    assert [todo["id"] for todo in rest["changed"]] == [third["id"]]
+    assert rest["deleted"] == [] and not rest["has_more"]
+
+    response = client.get("/todos/changes", headers=auth_headers, params={"since": "not-a-checkpoint"})
+    assert response.status_code == 400
+    assert client.get("/todos/changes").status_code == 401
+
+
+def test_reads_follow_writes_to_primary_then_use_replica(client: TestClient, auth_headers, replica):
+    from src.cache import MemoryCache, NullCache
+    from src.todos.cache import todo_cache
+    todo_cache.cache = NullCache()
+
+    response = client.post("/todos/", headers=auth_headers, json={"description": "Written to the primary"})
+    assert response.status_code == 201
+
+    # Pinned: the replica has no rows, so seeing the todo means the primary answered
+    response = client.get("/todos/", headers=auth_headers)
+    assert [todo["description"] for todo in response.json()] == ["Written to the primary"]
+
+    replica.cache = MemoryCache()  # the pin expires
+    response = client.get("/todos/", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == []
@@ -1,11 +1,19 @@
 import pytest
+import threading
+import time
 from datetime import timedelta
 from uuid import uuid4
 from src.auth import service as auth_service
 from src.auth.models import RegisterUserRequest
-from src.exceptions import AuthenticationError
+from src.exceptions import AuthenticationError, ServiceUnavailableError, TooManyRequestsError
+from src.auth.hashing import PasswordHashPool, create_password_context
+from src.auth.models import TokenData
+from src.auth.token_cache import TokenCache, INVALID_TOKEN
+from fastapi import Request
 from fastapi.security import OAuth2PasswordRequestForm
+from src.rate_limiter import LoginRateLimiter
 from src.entities.user import User
+from sqlalchemy import select
 
 class TestAuthService:
     def test_verify_password(self):
@@ -14,15 +22,15 @@ class TestAuthService:
         assert auth_service.verify_password(password, hashed)
         assert not auth_service.verify_password("wrongpassword", hashed)
 
-    def test_authenticate_user(self, db_session, test_user):
+    async def test_authenticate_user(self, db_session, async_db_session, test_user):
         db_session.add(test_user)
         db_session.commit()
         
-        user = auth_service.authenticate_user("test@example.com", "password123", db_session)
+        user = await auth_service.authenticate_user_async("test@example.com", "password123", async_db_session)
         assert user is not False
         assert user.email == test_user.email
 
-    def test_login_for_access_token(self, db_session, test_user):
+    async def test_login_for_access_token(self, db_session, async_db_session, test_user):
         db_session.add(test_user)
         db_session.commit()
 
@@ -35,19 +43,19 @@ class TestAuthService:
                 self.client_secret = None
         
         form_data = FormData()
-        token = auth_service.login_for_access_token(form_data, db_session)
+        token = await auth_service.login_for_access_token_async(form_data, async_db_session)
         assert token.token_type == "bearer"
         assert token.access_token is not None
 
 @pytest.mark.asyncio
-async def test_register_user(db_session):
+async def test_register_user(db_session, async_db_session):
     request = RegisterUserRequest(
         email="new@example.com",
         password="password123",
         first_name="New",
         last_name="User"
     )
-    auth_service.register_user(db_session, request)
+    await auth_service.register_user_async(async_db_session, request)
     
     user = db_session.query(User).filter_by(email="new@example.com").first()
     assert user is not None
@@ -55,7 +63,7 @@ async def test_register_user(db_session):
     assert user.first_name == "New"
     assert user.last_name == "User"
 
-def test_create_and_verify_token(db_session):
+async def test_create_and_verify_token(async_db_session):
     user_id = uuid4()
     token = auth_service.create_access_token("test@example.com", user_id, timedelta(minutes=30))
     
@@ -63,7 +71,7 @@ def test_create_and_verify_token(db_session):
     assert token_data.get_uuid() == user_id
 
     # Test invalid credentials
-    assert auth_service.authenticate_user("test@example.com", "wrongpassword", db_session) is False
+    assert await auth_service.authenticate_user_async("test@example.com", "wrongpassword", async_db_session) is False
 
     with pytest.raises(AuthenticationError):
         form_data = OAuth2PasswordRequestForm(
@@ -71,4 +79,177 @@ def test_create_and_verify_token(db_session):
             password="wrongpassword",
             scope=""
         )
-        auth_service.login_for_access_token(form_data, db_session) 
\ No newline at end of file
+        await auth_service.login_for_access_token_async(form_data, async_db_session) 
+
+async def test_register_and_login_async(async_db_session):
+    request = RegisterUserRequest(
+        email="async@example.com",
+        password="password123",
+        first_name="Async",
+        last_name="User"
+    )
+    await auth_service.register_user_async(async_db_session, request)
+
+    user = await auth_service.authenticate_user_async("async@example.com", "password123", async_db_session)
+    assert user is not False
+    assert user.first_name == "Async"
+    assert await auth_service.authenticate_user_async("async@example.com", "wrong", async_db_session) is False
+
+    form_data = OAuth2PasswordRequestForm(username="async@example.com", password="password123", scope="")
+    token = await auth_service.login_for_access_token_async(form_data, async_db_session)
+    assert auth_service.verify_token(token.access_token).get_uuid() == user.id
+
+
+
+def test_password_hash_pool_rejects_when_full():
+    pool = PasswordHashPool(max_workers=1, queue_limit=1)
+    release = threading.Event()
+    running = [pool._submit(release.wait), pool._submit(release.wait)]
+
+    with pytest.raises(ServiceUnavailableError) as exc_info:
+        pool.run(auth_service.get_password_hash, "password123")
+    assert exc_info.value.status_code == 503
+    assert pool.stats()["rejected"] == 1
+
+    release.set()
+    for future in running:
+        future.result()
+    hashed = pool.run(auth_service.get_password_hash, "password123")
+    assert auth_service.verify_password("password123", hashed)
+    assert pool.stats()["wait_time"]["count"] == 3
+
+
+async def test_password_hash_pool_runs_off_event_loop():
+    pool = PasswordHashPool(max_workers=2, queue_limit=0)
+    caller = threading.get_ident()
+    worker = await pool.run_async(threading.get_ident)
+    assert worker != caller
+
+
+def test_token_cache_expires_entries_at_exp():
+    now = [1000.0]
+    cache = TokenCache(max_size=2, negative_ttl=5, clock=lambda: now[0])
+    token_data = TokenData(user_id=str(uuid4()))
+
+    cache.put("valid", token_data, expires_at=1010)
+    cache.put_invalid("garbage")
+    assert cache.get("valid") is token_data
+    assert cache.get("garbage") is INVALID_TOKEN
+
+    now[0] = 1006
+    assert cache.get("garbage") is None
+    now[0] = 1010
+    assert cache.get("valid") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["negative_hits"], stats["misses"]) == (1, 1, 2)
+    assert stats["size"] == 0
+
+
+def test_token_cache_evicts_least_recently_used():
+    cache = TokenCache(max_size=2, negative_ttl=5, clock=lambda: 0)
+    for token in ("a", "b"):
+        cache.put(token, TokenData(user_id=str(uuid4())), expires_at=60)
+    cache.get("a")
+    cache.put("c", TokenData(user_id=str(uuid4())), expires_at=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_verify_token_never_serves_expired_token_from_cache(monkeypatch):
+    monkeypatch.setattr(auth_service, "token_cache", TokenCache())
+    user_id = uuid4()
+    token = auth_service.create_access_token("test@example.com", user_id, timedelta(seconds=1))
+
+    assert auth_service.verify_token(token).get_uuid() == user_id
+    cached = auth_service.verify_token(token)
+    assert cached.get_uuid() == user_id
+    assert auth_service.token_cache.stats()["hits"] == 1
+    assert cached.expires_at is not None and cached.expires_at <= time.time() + 1
+
+    time.sleep(1.1)
+    with pytest.raises(AuthenticationError):
+        auth_service.verify_token(token)
+
+    with pytest.raises(AuthenticationError):
+        auth_service.verify_token("not-a-jwt")
+    with pytest.raises(AuthenticationError):
+        auth_service.verify_token("not-a-jwt")
+    assert auth_service.token_cache.stats()["negative_hits"] == 1
+
+
+def make_request(ip: str) -> Request:
+    return Request({"type": "http", "client": (ip, 40000), "headers": []})
+
+
+async def test_login_rate_limiter_limits_accounts_and_ips():
+    limiter = LoginRateLimiter(per_account="2/minute", per_ip="4/minute")
+    attacker = make_request("10.0.0.1")
+
+    await limiter.check(attacker, "Ada@example.com")
+    await limiter.check(attacker, " ada@example.com ")
+    with pytest.raises(TooManyRequestsError) as error:
+        await limiter.check(attacker, "ada@example.com")
+    assert error.value.status_code == 429
+    assert int(error.value.headers["Retry-After"]) >= 1
+
+    # The account is locked for everyone, other accounts only count against the IP
+    with pytest.raises(TooManyRequestsError):
+        await limiter.check(make_request("10.0.0.2"), "ada@example.com")
+    await limiter.check(attacker, "grace@example.com")
+    with pytest.raises(TooManyRequestsError):
+        await limiter.check(attacker, "linus@example.com")
+
+    stats = {(labels["limit"], labels["result"]): count for labels, count in limiter.stats()}
+    assert stats[("login_ip", "rejected")] == 1
+    assert stats[("login_account", "rejected")] == 2
+    assert stats[("login_account", "allowed")] == 3
+
+
+async def test_login_rate_limiters_share_one_storage(monkeypatch):
+    from limits.aio.storage import MemoryStorage
+
+    # Stands in for one redis:// shared by every worker
+    shared = MemoryStorage()
+    monkeypatch.setattr("src.rate_limiter.rate_limit_storage", lambda uri: shared)
+    first = LoginRateLimiter(per_account="2/minute", per_ip="10/minute")
+    second = LoginRateLimiter(per_account="2/minute", per_ip="10/minute")
+
+    await first.check(make_request("10.0.0.1"), "ada@example.com")
+    await second.check(make_request("10.0.0.2"), "ada@example.com")
+    with pytest.raises(TooManyRequestsError):
+        await first.check(make_request("10.0.0.3"), "ada@example.com")
+
+
+def test_rate_limit_storage_names_the_unusable_uri():
+    from src.rate_limiter import rate_limit_storage
+
+    with pytest.raises(RuntimeError, match="RATE_LIMIT_STORAGE_URI 'nope://x'"):
+        rate_limit_storage("nope://x")
+
+
+@pytest.mark.asyncio
+async def test_authenticate_user_async_rehashes_outdated_cost(async_db_session, monkeypatch):
+    legacy_hash = create_password_context(bcrypt_rounds=4).hash("password123")
+    async_db_session.add(User(id=uuid4(), email="rehash@example.com", first_name="Re", last_name="Hash",
+                              password_hash=legacy_hash))
+    await async_db_session.commit()
+
+    monkeypatch.setattr(auth_service, "password_context", create_password_context(bcrypt_rounds=5))
+    assert await auth_service.authenticate_user_async("rehash@example.com", "wrongpassword", async_db_session) is False
+    user = await async_db_session.scalar(select(User).where(User.email == "rehash@example.com"))
+    assert user.password_hash == legacy_hash
+
+    user = await auth_service.authenticate_user_async("rehash@example.com", "password123", async_db_session)
+    assert user.password_hash.startswith("$2b$05$")
+    assert not auth_service.password_context.needs_update(user.password_hash)
+    assert auth_service.verify_password("password123", user.password_hash)
+    await async_db_session.refresh(user)
+    assert user.password_hash.startswith("$2b$05$")
+
+
+def test_create_password_context_rejects_unknown_scheme():
+    with pytest.raises(ValueError):
+        create_password_context("md5_crypt")
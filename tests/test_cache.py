@@ -0,0 +1,155 @@
+import queue
+from datetime import datetime, timezone
+from uuid import uuid4
+from src.auth.models import TokenData
+from src.cache import MemoryCache, RedisCache
+from src.entities.todo import Todo, Priority
+from src.pubsub import RedisPubSub
+from src.todos import models
+from src.todos import service as todos_service
+from src.todos.cache import TodoCache
+
+
+class FakeRedis:
+    """Just enough of redis.Redis for the cache and pub/sub backends"""
+
+    def __init__(self, bus=None):
+        self.store = {}
+        self.bus = bus if bus is not None else []
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value.encode()
+
+    def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    def publish(self, channel, data):
+        for subscriber in list(self.bus):
+            subscriber.push(channel, data)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        subscriber = FakeSubscriber()
+        self.bus.append(subscriber)
+        return subscriber
+
+
+class FakeSubscriber:
+    def __init__(self):
+        self.channels = set()
+        self.messages = queue.Queue()
+
+    def subscribe(self, *channels):
+        self.channels.update(channels)
+
+    def push(self, channel, data):
+        if channel in self.channels:
+            self.messages.put({"type": "message", "channel": channel.encode(), "data": data})
+
+    def listen(self):
+        while True:
+            yield self.messages.get()
+
+
+def make_todo(user_id, description="Cached"):
+    return Todo(
+        id=uuid4(),
+        user_id=user_id,
+        description=description,
+        is_completed=False,
+        priority=Priority.High,
+        created_at=datetime.now(timezone.utc),
+        due_date=None,
+        completed_at=None
+    )
+
+
+def test_memory_cache_expires_and_evicts():
+    now = [0.0]
+    cache = MemoryCache(max_size=2, ttl=10, clock=lambda: now[0])
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    now[0] = 11
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+
+
+def test_redis_cache_round_trips_json():
+    cache = RedisCache(FakeRedis(), ttl=5)
+    cache.set("key", {"items": [1, 2]})
+    assert cache.get("key") == {"items": [1, 2]}
+    cache.delete("key")
+    assert cache.get("key") is None
+
+
+def test_todo_cache_keys_follow_todos_version():
+    cache = TodoCache(MemoryCache())
+    user_id = uuid4()
+    todo = make_todo(user_id)
+    filters = models.TodoFilters()
+
+    cache.set_list(cache.list_key(user_id, 1, filters, None, None), [todo])
+    cache.set_item(cache.item_key(user_id, 1, todo.id), todo)
+
+    cached = cache.get_list(cache.list_key(user_id, 1, filters, None, None))
+    assert [t.id for t in cached] == [todo.id]
+    assert cached[0].priority == Priority.High
+    assert cache.get_item(cache.item_key(user_id, 1, todo.id)).description == "Cached"
+
+    # A write anywhere bumps the version, so no worker reads the old entries
+    assert cache.get_list(cache.list_key(user_id, 2, filters, None, None)) is None
+    assert cache.get_item(cache.item_key(user_id, 2, todo.id)) is None
+    assert cache.get_list(cache.list_key(uuid4(), 1, filters, None, None)) is None
+
+
+def test_todo_cache_old_versions_do_not_accumulate():
+    now = [0.0]
+    backend = MemoryCache(max_size=3, ttl=3600, clock=lambda: now[0])
+    cache = TodoCache(backend, ttl=10)
+    user_id = uuid4()
+    todo = make_todo(user_id)
+
+    for version in range(5):
+        cache.set_item(cache.item_key(user_id, version, todo.id), todo)
+    assert backend.stats()["size"] == 3
+    assert cache.get_item(cache.item_key(user_id, 0, todo.id)) is None
+
+    # Written with the cache's own ttl, not the backend default
+    now[0] = 11
+    assert cache.get_item(cache.item_key(user_id, 4, todo.id)) is None
+
+
+def test_todo_cache_sees_writes_made_without_it(db_session, test_user):
+    db_session.add(test_user)
+    db_session.commit()
+    token_data = TokenData(user_id=str(test_user.id))
+    assert todos_service.get_todos(token_data, db_session) == []
+
+    # Another worker's write: its own cache, nothing reaches this one
+    todos_service.bump_todos_version(db_session, test_user.id)
+    db_session.add(make_todo(test_user.id, "Written elsewhere"))
+    db_session.commit()
+
+    todos = todos_service.get_todos(token_data, db_session)
+    assert [todo.description for todo in todos] == ["Written elsewhere"]
+
+
+def test_redis_pubsub_reset_after_fork_gets_own_identity_and_listener():
+    bus = []
+    broker = RedisPubSub(FakeRedis(bus))
+    broker.subscribe("todo-events", lambda message: None)
+    parent_node, parent_thread = broker.node_id, broker._thread
+
+    broker.reset_after_fork()
+    assert broker.node_id != parent_node
+    assert broker._thread is not parent_thread and broker._thread.is_alive()
+    assert len(bus) == 2 and "todo-events" in bus[-1].channels
@@ -0,0 +1,177 @@
+import logging
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+from src.database.core import statement_stats
+from src.database.instrumentation import PoolStats, StatementStats, instrumented_pool_class, normalize_sql
+from uuid import uuid4
+
+
+def test_pool_stats_track_checkouts_and_timeouts():
+    stats = PoolStats()
+    engine = create_engine(
+        "sqlite:///./test.db",
+        poolclass=instrumented_pool_class(QueuePool, stats),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05
+    )
+    stats.listen(engine)
+
+    connection = engine.connect()
+    snapshot = stats.snapshot(engine.pool)
+    assert snapshot["checked_out"] == 1
+    assert snapshot["checkouts"] == 1
+
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    snapshot = stats.snapshot(engine.pool)
+    assert snapshot["timeouts"] == 1
+    assert snapshot["checkout_wait"]["count"] == 2
+    assert snapshot["checkout_wait"]["max"] >= 0.05
+
+    connection.close()
+    engine.dispose()
+    connection = engine.connect()
+    connection.close()
+    snapshot = stats.snapshot(engine.pool)
+    assert snapshot["checked_out"] == 0
+    assert snapshot["checkouts"] == 2
+    assert snapshot["connects"] == 2
+
+
+def test_pool_stats_endpoint(client, internal_headers):
+    response = client.get("/internal/pool", headers=internal_headers)
+    assert response.status_code == 200
+    assert {"sync", "async"} <= response.json().keys()
+    assert "checkout_wait" in response.json()["sync"]
+
+
+def test_internal_endpoints_require_token(client, internal_headers):
+    for path in ("/internal/pool", "/internal/timings", "/metrics"):
+        assert client.get(path).status_code == 401
+        assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+        assert client.get(path, headers=internal_headers).status_code == 200
+
+
+def test_internal_endpoints_are_opt_in():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from src.api import register_routes
+
+    app = FastAPI()
+    register_routes(app, internal_enabled=False)
+    with TestClient(app) as client:
+        assert client.get("/metrics").status_code == 404
+        assert client.get("/internal/pool").status_code == 404
+        assert client.get("/health/live").status_code == 200
+
+
+def test_normalize_sql():
+    assert normalize_sql("SELECT *\n  FROM todos WHERE id IN (?, ?, ?) AND description = 'it''s' LIMIT 10") == \
+        "SELECT * FROM todos WHERE id IN (?) AND description = ? LIMIT ?"
+    assert normalize_sql("UPDATE users SET v=v + %(v_1)s WHERE id = %(id_1)s") == "UPDATE users SET v=v + ? WHERE id = ?"
+
+
+def test_statement_stats_log_slow_and_repeated_statements(caplog):
+    stats = StatementStats(slow_threshold=0, repeat_threshold=3)
+    engine = create_engine("sqlite://")
+    stats.listen(engine)
+
+    with caplog.at_level(logging.WARNING), engine.connect() as connection:
+        with stats.track_request("GET /todos/") as request:
+            for value in range(3):
+                connection.execute(text(f"SELECT {value}"))
+        connection.execute(text("SELECT 1"))
+
+    assert request.count == 3
+    snapshot = stats.snapshot()
+    assert snapshot["statements"]["SELECT ?"]["count"] == 4
+    assert snapshot["slow_queries"] == 4
+    assert snapshot["repeated_statements"] == 1
+    assert snapshot["per_request"]["count"] == 1
+    assert "Possible N+1 in GET /todos/: statement ran 3 times: SELECT ?" in caplog.text
+    assert "Slow query" in caplog.text
+
+
+def test_statement_stats_bound_distinct_statements():
+    stats = StatementStats(slow_threshold=60, repeat_threshold=10, max_statements=1)
+    engine = create_engine("sqlite://")
+    stats.listen(engine)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        connection.execute(text("SELECT 1, 2 UNION SELECT 3, 4"))
+    assert set(stats.snapshot()["statements"]) == {"SELECT ?", "other"}
+
+
+def test_metrics_endpoint(client, auth_headers, internal_headers, db_session):
+    statement_stats.listen(db_session.get_bind())
+    client.get("/todos/", headers=auth_headers)
+
+    response = client.get("/metrics", headers=internal_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{router="todos",method="GET",status="200"}' in body
+    assert 'http_requests_total{router="auth",method="POST",status="201"}' in body
+    assert 'http_request_duration_seconds_bucket{router="todos",le="+Inf"}' in body
+    assert "db_statement_duration_seconds_count{statement=" in body
+    assert "db_statements_per_request_count" in body
+    assert 'db_pool_checked_out{engine="sync"}' in body
+
+
+def test_replica_router_pins_writers_to_primary(replica, db_session, test_user):
+    db_session.info["user_id"] = test_user.id
+    session = replica.replica_session(test_user.id)
+    assert session is not None
+    assert session.get_bind().url.database == "./test_replica.db"
+    session.close()
+
+    db_session.add(test_user)
+    db_session.commit()
+    assert replica.replica_session(test_user.id) is None
+    assert replica.replica_session(uuid4()) is not None
+
+    replica.cache.delete(f"db:primary:{test_user.id}")
+    assert replica.replica_session(test_user.id) is not None
+    assert dict((labels["target"], count) for labels, count in replica.stats()) == {"replica": 3, "primary": 1}
+
+
+def test_replica_router_ignores_reads_and_untagged_sessions(replica, db_session, test_user):
+    db_session.add(test_user)
+    db_session.commit()
+    db_session.info["user_id"] = test_user.id
+    db_session.scalar(text("SELECT 1"))
+    db_session.commit()
+    assert replica.replica_session(test_user.id) is not None
+
+
+def test_replica_pin_reads_wal_position_on_the_sessions_connection(replica, test_user, monkeypatch):
+    from sqlalchemy.orm import sessionmaker
+    from src.database import replicas
+    from src.database.core import Base
+
+    engine = create_engine("sqlite:///./test.db", poolclass=QueuePool, pool_size=1, max_overflow=0,
+                           pool_timeout=0.05)
+    Base.metadata.create_all(bind=engine)
+    used = []
+
+    def current_wal_lsn(connection):
+        # A second checkout would time out on this one-connection pool
+        assert connection.scalar(text("SELECT 1")) == 1
+        used.append(connection)
+        return "0/16B3748"
+
+    monkeypatch.setattr(replicas, "_current_wal_lsn", current_wal_lsn)
+    session = sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)()
+    try:
+        session.info["user_id"] = test_user.id
+        session.add(test_user)
+        connection = session.connection()
+        session.commit()
+    finally:
+        session.close()
+        engine.dispose()
+
+    assert used == [connection]
+    assert replica.cache.get(f"db:primary:{test_user.id}") == "0/16B3748"
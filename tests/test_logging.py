@@ -0,0 +1,57 @@
+import json
+import logging
+import queue
+from src import logging as app_logging
+from src.logging import JsonFormatter, NonBlockingQueueHandler, RequestSamplingFilter
+
+
+def make_record(level=logging.INFO, msg="Retrieved %s todos", args=(3,), **extra):
+    record = logging.LogRecord("root", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    entry = json.loads(JsonFormatter().format(make_record(route="GET /todos/", timings_ms={"db": 1.5})))
+    assert entry["level"] == "INFO"
+    assert entry["message"] == "Retrieved 3 todos"
+    assert entry["route"] == "GET /todos/"
+    assert entry["timings_ms"] == {"db": 1.5}
+    assert "args" not in entry
+
+
+def test_sampling_filter_drops_info_of_unsampled_requests():
+    sampling = RequestSamplingFilter()
+    assert sampling.filter(make_record())
+
+    token = app_logging._request_sampled.set(False)
+    try:
+        assert not sampling.filter(make_record())
+        assert sampling.filter(make_record(level=logging.WARNING))
+    finally:
+        app_logging._request_sampled.reset(token)
+
+    token = app_logging._request_sampled.set(True)
+    try:
+        assert sampling.filter(make_record())
+    finally:
+        app_logging._request_sampled.reset(token)
+
+
+def test_queue_handler_drops_when_full():
+    log_queue = queue.Queue(1)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert log_queue.qsize() == 1
+    assert handler.dropped == 1
+    assert log_queue.get_nowait().getMessage() == "Retrieved 3 todos"
+
+
+def test_queue_handler_leaves_formatting_to_the_listener():
+    log_queue = queue.Queue()
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    handler.handle(make_record())
+    record = log_queue.get_nowait()
+    assert record.msg == "Retrieved %s todos" and record.args == (3,)
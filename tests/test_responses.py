@@ -0,0 +1,51 @@
+import json
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from src.entities.todo import Todo, Priority
+from src.entities.user import User
+from src.responses import model_response
+from src.todos.models import TodoResponse, todo_list_adapter, todo_response_adapter
+from src.users.models import UserResponse, user_response_adapter
+
+
+def default_response_body(model, content):
+    # Mirrors FastAPI's serialize_response for a route returning ORM objects through response_model
+    adapter = TypeAdapter(list[model] if isinstance(content, list) else model)
+    validated = adapter.validate_python(content, from_attributes=True)
+    return JSONResponse(adapter.dump_python(validated, mode="json", by_alias=True)).body
+
+
+def make_todos():
+    now = datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+    descriptions = ['Plain', 'Quote " and \\ backslash', "Ünïcødé ✓ 日本", "Tab\tnew\nline \x01", ""]
+    return [
+        Todo(
+            id=uuid4(),
+            user_id=uuid4(),
+            description=description,
+            due_date=None if i % 2 else now + timedelta(days=i),
+            priority=list(Priority)[i % len(Priority)],
+            is_completed=bool(i % 2),
+            completed_at=now.replace(tzinfo=None) if i % 2 else None,
+            created_at=now
+        )
+        for i, description in enumerate(descriptions)
+    ]
+
+
+def test_todo_list_response_is_byte_identical():
+    todos = make_todos()
+    response = model_response(todo_list_adapter, todos)
+    assert response.media_type == "application/json"
+    assert response.body == default_response_body(TodoResponse, todos)
+    assert len(json.loads(response.body)) == len(todos)
+
+
+def test_single_responses_are_byte_identical():
+    todo = make_todos()[2]
+    assert model_response(todo_response_adapter, todo).body == default_response_body(TodoResponse, todo)
+
+    user = User(id=uuid4(), email="ada@example.com", first_name="Ada", last_name="Łovelace", password_hash="x")
+    assert model_response(user_response_adapter, user).body == default_response_body(UserResponse, user)
@@ -0,0 +1,117 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from src.serve import Arbiter, WORKER_BOOT_ERROR, available_cpus, parse_args, process_local_state
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_available_cpus_applies_cgroup_quota(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)))
+    assert available_cpus(str(tmp_path)) == 8
+
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert available_cpus(str(tmp_path)) == 2
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert available_cpus(str(tmp_path)) == 8
+
+    (tmp_path / "cpu.max").unlink()
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("300000\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert available_cpus(str(tmp_path)) == 3
+
+
+def test_serve_refuses_several_workers_with_process_local_state(monkeypatch):
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.delenv("RATE_LIMIT_STORAGE_URI", raising=False)
+    monkeypatch.setenv("DATABASE_REPLICA_URLS", "sqlite:///./replica.db")
+    monkeypatch.delenv("CACHE_BACKEND", raising=False)
+    assert len(process_local_state()) == 3
+
+    arbiter = Arbiter(parse_args(["--workers", "2"]))
+    monkeypatch.setattr(arbiter, "bind", lambda: pytest.fail("bound the socket"))
+    assert arbiter.run() == WORKER_BOOT_ERROR
+
+    monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+    monkeypatch.setenv("RATE_LIMIT_STORAGE_URI", "redis://localhost:6379/1")
+    monkeypatch.setenv("CACHE_BACKEND", "redis")
+    assert process_local_state() == []
+
+
+def test_serve_master_does_not_import_the_app():
+    code = "import sys, src.serve; print(sorted(m for m in sys.modules if m.startswith('src.')))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "['src.serve']"
+
+
+def child_pids(pid: int) -> set[int]:
+    children = set()
+    for entry in Path("/proc").iterdir():
+        if entry.name.isdigit():
+            try:
+                stat = (entry / "stat").read_text()
+            except OSError:
+                continue
+            # The command name may contain spaces; fields after it are space separated
+            if int(stat.rsplit(")", 1)[1].split()[1]) == pid:
+                children.add(int(entry.name))
+    return children
+
+
+def wait_for(condition, timeout: float = 20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.1)
+    raise AssertionError("timed out")
+
+
+@pytest.mark.skipif(not Path("/proc/self/stat").exists(), reason="needs /proc to find worker processes")
+def test_prefork_server_serves_reloads_and_stops():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    env = {**os.environ, "DATABASE_URL": "sqlite:///./test.db", "STARTUP_WARMUP": "false"}
+    master = subprocess.Popen([sys.executable, "-m", "src.serve", "--port", str(port), "--workers", "2", "--preload",
+                               "--graceful-timeout", "5", "--allow-process-local-state"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        def ready():
+            try:
+                return httpx.get(f"http://127.0.0.1:{port}/health/ready", timeout=1).json()
+            except httpx.HTTPError:
+                return None
+
+        health = wait_for(ready)
+        assert health["status"] == "ready"
+        assert health["worker"] in ("0", "1")
+        def workers_other_than(old: set[int]):
+            children = child_pids(master.pid) - old
+            return children if len(children) == 2 else None
+
+        workers = wait_for(lambda: workers_other_than(set()))
+        assert health["pid"] in workers
+
+        master.send_signal(signal.SIGHUP)
+        new_workers = wait_for(lambda: workers_other_than(workers))
+        wait_for(lambda: child_pids(master.pid) == new_workers)
+        assert wait_for(ready)["pid"] not in workers
+
+        master.send_signal(signal.SIGTERM)
+        assert master.wait(timeout=15) == 0
+    finally:
+        if master.poll() is None:
+            master.kill()
+            master.wait()
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from src.database.core import database
+from src.startup import StartupState, startup_state, warm_up
+
+# Generous for noisy CI machines; importing the app takes about a second
+IMPORT_BUDGET_SECONDS = 3.0
+WARM_UP_BUDGET_SECONDS = 5.0
+
+ROOT = Path(__file__).resolve().parent.parent
+
+IMPORT_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import src.main
+elapsed = time.perf_counter() - started
+from src.database.core import database
+print(json.dumps({"seconds": elapsed, "database_started": database.started}))
+"""
+
+
+def test_import_is_fast_and_does_not_touch_the_database():
+    env = {key: value for key, value in os.environ.items() if key != "DATABASE_URL"}
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=ROOT, env=env, capture_output=True,
+                            text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    assert result["database_started"] is False
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS
+
+
+def test_warm_up_fills_pool_and_reports_ready(client):
+    from src.main import app
+    state = StartupState()
+
+    async def run():
+        started = time.perf_counter()
+        await warm_up(app, state, connections=2)
+        elapsed = time.perf_counter() - started
+        checked_in = database.engine.pool.checkedin()
+        await database.dispose()
+        return elapsed, checked_in
+
+    elapsed, checked_in = asyncio.run(run())
+    assert state.ready
+    assert state.snapshot()["status"] == "ready"
+    assert set(state.timings_ms) == {"pool", "password_hash", "routes"}
+    assert checked_in == 2
+    assert elapsed < WARM_UP_BUDGET_SECONDS
+
+
+def test_readiness_waits_for_warm_up(client, monkeypatch):
+    assert client.get("/health/live").json() == {"status": "ok"}
+    assert client.get("/health/ready").status_code == 200
+
+    monkeypatch.setattr(startup_state, "ready", False)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "warming"
+    assert client.get("/health/live").status_code == 200
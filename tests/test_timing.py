@@ -0,0 +1,52 @@
+import time
+from fastapi.testclient import TestClient
+from src import timing
+from src.timing import RequestTiming, RouteTimings, phase
+
+
+def test_nested_phases_are_exclusive():
+    request_timing = RequestTiming()
+    token = timing._current.set(request_timing)
+    try:
+        with phase("orm"):
+            time.sleep(0.02)
+            with phase("db"):
+                time.sleep(0.03)
+    finally:
+        timing._current.reset(token)
+
+    assert 0.02 <= request_timing.phases["orm"] < 0.03
+    assert request_timing.phases["db"] >= 0.03
+    assert request_timing.elapsed() >= sum(request_timing.phases.values())
+    assert request_timing.header_value().startswith("db;dur=")
+
+
+def test_phase_outside_request_is_noop():
+    with phase("orm"):
+        pass
+    assert timing._current.get() is None
+
+
+def test_route_timings_snapshot():
+    timings = RouteTimings()
+    for seconds in (0.001, 0.002, 0.003):
+        timings.observe("GET /todos/", {"db": seconds, "total": seconds * 2})
+
+    snapshot = timings.snapshot()
+    assert snapshot["GET /todos/"]["db"]["count"] == 3
+    assert snapshot["GET /todos/"]["total"]["max"] == 0.006
+
+
+def test_server_timing_header(client: TestClient, auth_headers, internal_headers, db_session):
+    timing.listen(db_session.get_bind())
+    timing.route_timings.clear()
+    todo_id = client.post("/todos/", headers=auth_headers, json={"description": "Timed"}).json()["id"]
+
+    response = client.get("/todos/", headers=auth_headers)
+    metrics = {entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")}
+    assert {"auth", "db", "orm", "serialize", "total"} <= metrics
+
+    client.get(f"/todos/{todo_id}", headers=auth_headers)
+    snapshot = client.get("/internal/timings", headers=internal_headers).json()
+    assert snapshot["GET /todos/"]["total"]["count"] == 1
+    assert snapshot["GET /todos/{todo_id}"]["auth"]["count"] == 1
@@ -1,9 +1,20 @@
+import asyncio
+import io
+import json
+import time
+import tracemalloc
 import pytest
+from sqlalchemy import insert
+from datetime import datetime, timedelta, timezone
 from uuid import uuid4
+from src.pubsub import LocalPubSub
 from src.todos import service as todos_service
-from src.todos.models import TodoCreate
-from src.exceptions import TodoNotFoundError
-from src.entities.todo import Todo
+from src.todos.events import TodoEventHub, todo_events
+from src.todos.models import (TodoFileFormat, TodoCreate, TodoFilters, TodoSortKey, SortOrder, TodoBatchRequest,
+                              TodoBatchOperation, TodoBatchItemStatus, TodoEventType)
+from src.exceptions import TodoNotFoundError, InvalidCursorError, InvalidCheckpointError
+from src.entities.todo import Todo, Priority
+from src.auth.models import TokenData
 
 class TestTodosService:
     def test_create_todo(self, db_session, test_token_data):
@@ -25,6 +36,86 @@ class TestTodosService:
         assert len(todos) == 1
         assert todos[0].id == test_todo.id
 
+    def test_get_todos_paginates_with_cursor(self, db_session, test_token_data):
+        created_at = datetime.now(timezone.utc)
+        for i in range(5):
+            db_session.add(Todo(
+                description=f"Todo {i}",
+                user_id=test_token_data.get_uuid(),
+                created_at=created_at + timedelta(seconds=i % 3)
+            ))
+        db_session.commit()
+
+        seen = []
+        cursor = None
+        while True:
+            page = todos_service.get_todos(test_token_data, db_session, limit=2, cursor=cursor)
+            seen.extend(page)
+            cursor = todos_service.get_next_cursor(page, 2)
+            if cursor is None:
+                break
+
+        assert len(seen) == 5
+        assert len({todo.id for todo in seen}) == 5
+        keys = [(todo.created_at, str(todo.id)) for todo in seen]
+        assert keys == sorted(keys)
+
+    def test_get_todos_invalid_cursor(self, db_session, test_token_data):
+        with pytest.raises(InvalidCursorError):
+            todos_service.get_todos(test_token_data, db_session, limit=2, cursor="not-a-cursor")
+
+    def test_get_todos_filters_and_sorts(self, db_session, test_token_data):
+        now = datetime.now(timezone.utc)
+        todos = [
+            Todo(description="open high", priority=Priority.High, due_date=now + timedelta(days=2)),
+            Todo(description="open top", priority=Priority.Top, due_date=now + timedelta(days=1)),
+            Todo(description="open low", priority=Priority.Low, due_date=None),
+            Todo(description="done high", priority=Priority.High, is_completed=True, due_date=now),
+        ]
+        for todo in todos:
+            todo.user_id = test_token_data.get_uuid()
+            db_session.add(todo)
+        db_session.commit()
+
+        filters = TodoFilters(completed=False, priority=[Priority.High, Priority.Top],
+                              sort=TodoSortKey.priority, order=SortOrder.desc)
+        result = todos_service.get_todos(test_token_data, db_session, filters=filters)
+        assert [todo.description for todo in result] == ["open top", "open high"]
+
+        filters = TodoFilters(due_before=now + timedelta(days=1, hours=12), due_after=now + timedelta(hours=1))
+        result = todos_service.get_todos(test_token_data, db_session, filters=filters)
+        assert [todo.description for todo in result] == ["open top"]
+
+        filters = TodoFilters(completed=False, sort=TodoSortKey.due_date)
+        result = todos_service.get_todos(test_token_data, db_session, filters=filters)
+        assert [todo.description for todo in result] == ["open top", "open high", "open low"]
+
+    @pytest.mark.parametrize("sort", list(TodoSortKey))
+    @pytest.mark.parametrize("order", list(SortOrder))
+    def test_get_todos_paginates_every_sort_order(self, db_session, test_token_data, sort, order):
+        now = datetime.now(timezone.utc)
+        for i in range(7):
+            db_session.add(Todo(
+                description=f"Todo {i}",
+                user_id=test_token_data.get_uuid(),
+                priority=list(Priority)[i % 3],
+                due_date=None if i % 3 == 0 else now + timedelta(days=i % 2)
+            ))
+        db_session.commit()
+
+        filters = TodoFilters(sort=sort, order=order)
+        expected = [todo.id for todo in todos_service.get_todos(test_token_data, db_session, filters=filters)]
+        seen = []
+        cursor = None
+        while True:
+            page = todos_service.get_todos(test_token_data, db_session, filters=filters, limit=3, cursor=cursor)
+            seen.extend(todo.id for todo in page)
+            cursor = todos_service.get_next_cursor(page, 3, filters)
+            if cursor is None:
+                break
+        assert seen == expected
+        assert len(seen) == 7
+
     def test_get_todo_by_id(self, db_session, test_token_data, test_todo):
         test_todo.user_id = test_token_data.get_uuid()
         db_session.add(test_todo)
@@ -51,4 +142,203 @@ class TestTodosService:
         db_session.commit()
         
         todos_service.delete_todo(test_token_data, db_session, test_todo.id)
-        assert db_session.query(Todo).filter_by(id=test_todo.id).first() is None 
\ No newline at end of file
+        assert db_session.query(Todo).filter_by(id=test_todo.id).first() is None
+
+    def test_apply_todo_batch(self, db_session, test_token_data):
+        existing = [Todo(description=f"Existing {i}", user_id=test_token_data.get_uuid()) for i in range(3)]
+        foreign = Todo(description="Someone else's", user_id=uuid4())
+        db_session.add_all(existing + [foreign])
+        db_session.commit()
+
+        batch = TodoBatchRequest(operations=[
+            TodoBatchOperation(op="create", todo=TodoCreate(description="Created offline")),
+            TodoBatchOperation(op="update", id=existing[0].id, todo=TodoCreate(description="Edited offline")),
+            TodoBatchOperation(op="complete", id=existing[1].id),
+            TodoBatchOperation(op="delete", id=existing[2].id),
+            TodoBatchOperation(op="delete", id=foreign.id),
+        ])
+        response = todos_service.apply_todo_batch(test_token_data, db_session, batch)
+
+        statuses = [result.status for result in response.results]
+        assert statuses == [TodoBatchItemStatus.ok] * 4 + [TodoBatchItemStatus.not_found]
+        db_session.expire_all()
+        todos = {todo.id: todo for todo in todos_service.get_todos(test_token_data, db_session)}
+        assert todos[response.results[0].id].description == "Created offline"
+        assert todos[existing[0].id].description == "Edited offline"
+        assert todos[existing[1].id].is_completed
+        assert existing[2].id not in todos
+        assert db_session.get(Todo, foreign.id) is not None 
+
+def _export_peak_memory(db_session, token_data, rows: int) -> int:
+    db_session.execute(insert(Todo), [
+        {"id": uuid4(), "user_id": token_data.get_uuid(), "description": f"Exported todo {i} " + "x" * 100}
+        for i in range(rows)
+    ])
+    db_session.commit()
+    db_session.expunge_all()
+
+    tracemalloc.start()
+    exported = 0
+    for chunk in todos_service.export_todos(token_data, db_session, TodoFileFormat.ndjson, chunk_size=500):
+        exported += chunk.count(b"\n")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert exported == rows
+    return peak
+
+
+def test_export_todos_memory_is_constant(db_session):
+    small = _export_peak_memory(db_session, TokenData(user_id=str(uuid4())), 2_000)
+    large = _export_peak_memory(db_session, TokenData(user_id=str(uuid4())), 40_000)
+    # 20x the rows must not mean 20x the memory; allow headroom for allocator noise
+    assert large < small * 2
+
+
+def test_export_todos_formats(db_session, test_token_data, test_todo):
+    db_session.add(test_todo)
+    db_session.commit()
+
+    ndjson = b"".join(todos_service.export_todos(test_token_data, db_session, TodoFileFormat.ndjson))
+    record = json.loads(ndjson.decode().splitlines()[0])
+    assert record["id"] == str(test_todo.id)
+    assert record["priority"] == 2
+
+    csv_export = b"".join(todos_service.export_todos(test_token_data, db_session, TodoFileFormat.csv)).decode()
+    header, row = csv_export.splitlines()
+    assert header.startswith("id,description,due_date")
+    assert row.startswith(f"{test_todo.id},Test Description")
+
+
+def test_import_todos_reports_row_errors(db_session, test_token_data):
+    upload = io.BytesIO(
+        b'{"description": "First", "priority": 3}\n'
+        b'not json\n'
+        b'\n'
+        b'{"priority": 2}\n'
+        b'{"description": "Second", "due_date": "2030-01-01T09:00:00"}\n'
+        b'{"description": "Third", "priority": "Top"}\n'
+    )
+    result = todos_service.import_todos(test_token_data, db_session, upload, TodoFileFormat.ndjson, chunk_size=2)
+
+    assert result.imported == 3
+    assert result.failed == 2
+    assert [error.line for error in result.errors] == [2, 4]
+    assert "description" in result.errors[1].error
+    todos = todos_service.get_todos(test_token_data, db_session)
+    assert sorted(todo.description for todo in todos) == ["First", "Second", "Third"]
+
+
+def test_import_todos_round_trips_csv_export(db_session, test_token_data):
+    todos_service.create_todo(test_token_data, db_session, TodoCreate(description='Say "hi", then leave', priority=Priority.Top))
+    exported = b"".join(todos_service.export_todos(test_token_data, db_session, TodoFileFormat.csv))
+
+    other_user = TokenData(user_id=str(uuid4()))
+    result = todos_service.import_todos(other_user, db_session, io.BytesIO(exported), TodoFileFormat.csv)
+
+    assert (result.imported, result.failed) == (1, 0)
+    [todo] = todos_service.get_todos(other_user, db_session)
+    assert todo.description == 'Say "hi", then leave'
+    assert todo.priority == Priority.Top
+
+
+def test_copy_buffer_distinguishes_null_from_empty():
+    row = {"id": uuid4(), "user_id": uuid4(), "description": "", "due_date": None,
+           "priority": Priority.High, "is_completed": False, "created_at": datetime(2030, 1, 1),
+           "updated_at": datetime(2030, 1, 1)}
+    line = todos_service._copy_buffer([row]).getvalue()
+    assert line == (f'"{row["id"]}","{row["user_id"]}","",,"High","False",'
+                    '"2030-01-01T00:00:00","2030-01-01T00:00:00"\n')
+
+
+def test_todo_changes_report_batch_and_import_writes(db_session, test_token_data):
+    kept = todos_service.create_todo(test_token_data, db_session, TodoCreate(description="Kept"))
+    removed = todos_service.create_todo(test_token_data, db_session, TodoCreate(description="Removed"))
+    checkpoint = todos_service.get_todo_changes(test_token_data, db_session).checkpoint
+
+    todos_service.apply_todo_batch(test_token_data, db_session, TodoBatchRequest(operations=[
+        TodoBatchOperation(op="update", id=kept.id, todo=TodoCreate(description="Renamed")),
+        TodoBatchOperation(op="delete", id=removed.id),
+    ]))
+    todos_service.import_todos(test_token_data, db_session, io.BytesIO(b'{"description": "Imported"}\n'),
+                               TodoFileFormat.ndjson)
+
+    changes = todos_service.get_todo_changes(test_token_data, db_session, since=checkpoint)
+    assert [todo.description for todo in changes.changed] == ["Renamed", "Imported"]
+    assert changes.deleted == [removed.id]
+    assert not changes.has_more
+    assert todos_service.decode_checkpoint(changes.checkpoint)[0] > todos_service.decode_checkpoint(checkpoint)[0]
+
+
+def test_todo_changes_rejects_invalid_checkpoint(db_session, test_token_data):
+    with pytest.raises(InvalidCheckpointError):
+        todos_service.get_todo_changes(test_token_data, db_session, since="bm90IGpzb24")
+
+
+async def _drain(subscription) -> list[dict]:
+    await asyncio.sleep(0)  # run the deliveries scheduled with call_soon_threadsafe
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+async def test_writes_publish_todo_events(db_session, test_token_data):
+    other_user = TokenData(user_id=str(uuid4()))
+    with todo_events.subscribe(test_token_data.get_uuid()) as mine, todo_events.subscribe(other_user.get_uuid()) as theirs:
+        todo = todos_service.create_todo(test_token_data, db_session, TodoCreate(description="Streamed"))
+        todos_service.update_todo(test_token_data, db_session, todo.id, TodoCreate(description="Renamed"))
+        todos_service.complete_todo(test_token_data, db_session, todo.id)
+        todos_service.delete_todo(test_token_data, db_session, todo.id)
+        todos_service.apply_todo_batch(test_token_data, db_session, TodoBatchRequest(operations=[
+            TodoBatchOperation(op="create", todo=TodoCreate(description="Batched"))]))
+
+        events = await _drain(mine)
+        assert [event["type"] for event in events] == [
+            TodoEventType.created, TodoEventType.updated, TodoEventType.completed,
+            TodoEventType.deleted, TodoEventType.changed,
+        ]
+        assert events[0]["data"]["description"] == "Streamed"
+        assert events[1]["data"]["description"] == "Renamed"
+        assert events[2]["data"]["is_completed"] is True
+        assert events[3]["data"] == {"id": str(todo.id)}
+        assert await _drain(theirs) == []
+    assert str(test_token_data.get_uuid()) not in todo_events._subscriptions
+
+
+async def test_slow_stream_gets_resync_instead_of_unbounded_queue():
+    hub = TodoEventHub(LocalPubSub(), queue_size=2)
+    user_id = uuid4()
+    with hub.subscribe(user_id) as subscription:
+        for i in range(5):
+            hub.publish(user_id, TodoEventType.deleted, {"id": str(i)})
+        events = await _drain(subscription)
+    assert len(events) <= 2
+    assert TodoEventType.resync in [event["type"] for event in events]
+
+
+async def test_event_stream_formats_server_sent_events():
+    hub = TodoEventHub(LocalPubSub(), keepalive=0.01)
+    user_id = uuid4()
+    stream = hub.stream(user_id)
+    assert await stream.__anext__() == "retry: 3000\n\n"
+    assert await stream.__anext__() == ": keep-alive\n\n"
+
+    hub.publish(user_id, TodoEventType.deleted, {"id": "abc"})
+    assert await stream.__anext__() == 'event: deleted\ndata: {"id":"abc"}\n\n'
+    await stream.aclose()
+    assert hub._subscriptions == {}
+
+
+async def test_event_stream_ends_when_token_expires():
+    hub = TodoEventHub(LocalPubSub(), keepalive=10)
+    user_id = uuid4()
+    stream = hub.stream(user_id, expires_at=time.time() + 0.05)
+    assert await stream.__anext__() == "retry: 3000\n\n"
+
+    # Ends at the expiry, not at the next keep-alive
+    started = time.perf_counter()
+    assert await stream.__anext__() == "event: expired\ndata: {}\n\n"
+    assert time.perf_counter() - started < 1
+    with pytest.raises(StopAsyncIteration):
+        await stream.__anext__()
+    assert hub._subscriptions == {}